@@ -6,6 +6,7 @@ import json
 import asyncio
 from direct_transcribe import DirectTranscribe
 from direct_transcribe_db import DirectTranscribeDB
+from transcription_store import store_callback_result, verify_callback_token
 from datetime import datetime
 
 # Configure logging
@@ -1090,6 +1091,37 @@ def speaker_diarization():
         logger.exception(f"Error processing speaker diarization request: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/deepgram/callback/<fileid>', methods=['POST'])
+def deepgram_callback(fileid):
+    """Receive a Deepgram result submitted with a callback and store it"""
+    try:
+        blob_name = request.args.get('blob_name')
+        if not blob_name:
+            return jsonify({"success": False, "error": "No blob_name provided"}), 400
+        
+        # Only accept callbacks whose URL was signed when the file was submitted
+        if not verify_callback_token(fileid, blob_name, request.args.get('token')):
+            logger.warning(f"Rejected Deepgram callback with a missing or invalid token for ID {fileid}")
+            return jsonify({"success": False, "error": "Invalid callback token"}), 403
+        
+        data = request.get_json(force=True, silent=True)
+        if not data:
+            return jsonify({"success": False, "error": "No data provided"}), 400
+        
+        logger.info(f"Received Deepgram callback for file {blob_name} with ID {fileid}")
+        
+        success, storage_result = store_callback_result(fileid, blob_name, data)
+        
+        if not success:
+            logger.error(f"Failed to store callback result for {fileid}: {storage_result}")
+            return jsonify({"success": False, "error": storage_result, "fileid": fileid}), 500
+        
+        return jsonify({"success": True, "fileid": fileid, "result": storage_result}), 200
+        
+    except Exception as e:
+        logger.exception(f"Error processing Deepgram callback: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 def extract_speaker_segments(transcription_result):
     """
     Extract speaker segments from Deepgram API response
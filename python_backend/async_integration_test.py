@@ -132,7 +132,8 @@ async def run_async_integration_test(blob_name=None):
             transcript_text = full_response.get('transcript', '')
             detected_language = full_response.get('language', 'en')
             
-            # Prepare data for upsert
+            # Prepare data for upsert; one timestamp so created_dt and processed_date match
+            now = datetime.now()
             asset_data = {
                 'filename': blob_name,
                 'source_path': f"shahulin/{blob_name}",
@@ -140,8 +141,8 @@ async def run_async_integration_test(blob_name=None):
                 'transcription_json': json.dumps(full_response),
                 'language_detected': detected_language,
                 'status': 'completed',
-                'created_dt': datetime.now(),
-                'processed_date': datetime.now(),
+                'created_dt': now,
+                'processed_date': now,
                 'processing_duration': transcription_result.get('duration', 0)
             }
             
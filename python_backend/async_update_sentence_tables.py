@@ -105,7 +105,7 @@ async def store_transcription_details_async(fileid, transcription_json):
                         
                         # Use RDS_ prefixed stored procedure
                         await cursor.execute(
-                            "DECLARE @new_para_id INT; EXEC RDS_InsertParagraph @fileid=%s, @paragraph_idx=%s, @text=%s, @start_time=%s, @end_time=%s, @speaker=%s, @num_words=%s, @paragraph_id=@new_para_id OUTPUT; SELECT @new_para_id;",
+                            "EXEC RDS_InsertParagraph @fileid=%s, @paragraph_idx=%s, @text=%s, @start_time=%s, @end_time=%s, @speaker=%s, @num_words=%s",
                             (fileid, para_idx, para_text, para_start, para_end, speaker, num_words)
                         )
                         
@@ -11,11 +11,12 @@ This is built as a module that can be imported and used by the main application.
 
 import os
 import json
+import orjson
 import time
 import uuid
 import logging
 import tempfile
-import requests
+from http_session import SESSION
 from datetime import datetime
 import shutil
 import sys
@@ -198,7 +199,7 @@ def transcribe_azure_audio(blob_name, api_key=None, model="nova-2", diarize=True
                 logger.info(f"File MD5 hash: {file_hash}")
                 
                 # Make the API request
-                response = requests.post(
+                response = SESSION.post(
                     url,
                     params=params,
                     headers=headers,
@@ -212,12 +213,13 @@ def transcribe_azure_audio(blob_name, api_key=None, model="nova-2", diarize=True
                 # Check if the request was successful
                 if response.status_code == 200:
                     # Parse and return the JSON response
-                    result = response.json()
-                    logger.info(f"DEEPGRAM RAW RESPONSE: {json.dumps(result)}")
+                    result = orjson.loads(response.content)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("DEEPGRAM RAW RESPONSE: %s", response.text)
                     
                     # Print debug info about the response
                     if isinstance(result, dict):
-                        logger.info(f"Response keys: {', '.join(result.keys())}")
+                        logger.debug("Response keys: %s", result.keys())
                                 
                     return result
                 else:
@@ -227,7 +229,7 @@ def transcribe_azure_audio(blob_name, api_key=None, model="nova-2", diarize=True
                     
                     # Try to parse error as JSON if possible
                     try:
-                        error_json = response.json()
+                        error_json = orjson.loads(response.content)
                         return {"error": error_json}
                     except:
                         return {"error": {"status": response.status_code, "message": response.text}}
@@ -2,8 +2,14 @@ import pymssql
 import logging
 import json
 import os
+import queue
+from contextlib import contextmanager
 from datetime import datetime
 
+# Open connections shared by every AzureSQLService instance, so callers skip the TLS + login handshake
+SQL_POOL_SIZE = int(os.environ.get("AZURE_SQL_POOL_SIZE", "16"))
+_connection_pool = queue.LifoQueue(maxsize=SQL_POOL_SIZE)
+
 class AzureSQLService:
     def __init__(self):
         """Initialize the Azure SQL Service"""
@@ -16,9 +22,10 @@ class AzureSQLService:
         self.password = os.environ.get("AZURE_SQL_PASSWORD", "apple123!@#")
         self.port = int(os.environ.get("AZURE_SQL_PORT", "1433"))
         
-        # Test the connection
+        # Test the connection (it is kept in the pool for the first caller)
         try:
-            self._get_connection()
+            with self.get_conn():
+                pass
             self.logger.info("Azure SQL Service initialized successfully")
         except Exception as e:
             self.logger.error(f"Error initializing Azure SQL Service: {str(e)}")
@@ -41,6 +48,50 @@ class AzureSQLService:
             self.logger.error(f"Error connecting to Azure SQL Server: {str(e)}")
             raise
     
+    @contextmanager
+    def get_conn(self):
+        """
+        Borrow a connection from the shared pool
+        
+        A pooled connection is checked with SELECT 1 before it is handed out.
+        When the block exits, uncommitted work is rolled back and the connection
+        goes back to the pool; a connection that raised is closed instead.
+        
+        Yields:
+            pymssql.Connection: An open connection (rows are returned as dicts)
+        """
+        conn = None
+        while conn is None:
+            try:
+                conn = _connection_pool.get_nowait()
+            except queue.Empty:
+                conn = self._get_connection()
+                break
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+                cursor.close()
+            except Exception:
+                self.logger.info("Discarding stale pooled SQL connection")
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+        
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+        
+        try:
+            conn.rollback()
+            _connection_pool.put_nowait(conn)
+        except Exception:
+            conn.close()
+    
     def get_analysis_results(self, fileid):
         """
         Get analysis results for a file
@@ -200,7 +251,7 @@ class AzureSQLService:
             
             # Get processed count
             cursor.execute("""
-                SELECT COUNT(*) as count FROM rdt_assets WHERE status = 'completed'
+                SELECT COUNT(*) as count FROM rdt_assets WHERE status IN ('completed', 'completed_with_errors')
             """)
             processed = cursor.fetchone()
             if processed:
@@ -287,4 +338,15 @@ class AzureSQLService:
             return topics
         except Exception as e:
             self.logger.error(f"Error getting topic stats: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+
+# Shared instance, so scripts do not repeat the connection test in __init__ for every use
+_sql_service = None
+
+def get_sql_service():
+    """Return the shared AzureSQLService, creating it on first use"""
+    global _sql_service
+    if _sql_service is None:
+        _sql_service = AzureSQLService()
+    return _sql_service
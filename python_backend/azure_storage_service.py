@@ -12,13 +12,37 @@ This module provides functions to interact with Azure Blob Storage, including:
 from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient, generate_blob_sas
 from azure.storage.blob import BlobSasPermissions
 from datetime import datetime, timedelta
+import functools
 import os
 import logging
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SAS tokens are reused for this many seconds before a fresh one is signed
+SAS_CACHE_SECONDS = 600
+
+@functools.lru_cache(maxsize=4096)
+def _cached_sas_token(account_name, account_key, container_name, blob_name, expiry_hours, expiry_bucket):
+    """
+    Sign a read SAS token for a blob, once per cache bucket.
+    
+    The expiry is measured from the end of the bucket, so a token handed out
+    from the cache always has at least expiry_hours left to run.
+    """
+    expiry = (datetime.utcfromtimestamp((expiry_bucket + 1) * SAS_CACHE_SECONDS)
+              + timedelta(hours=expiry_hours))
+    return generate_blob_sas(
+        account_name=account_name,
+        container_name=container_name,
+        blob_name=blob_name,
+        account_key=account_key,
+        permission=BlobSasPermissions(read=True),  # Allow read access
+        expiry=expiry,  # Set expiration
+    )
+
 class AzureStorageService:
     """
     Azure Storage Service class that provides methods to interact with Azure Blob Storage.
@@ -208,18 +232,14 @@ class AzureStorageService:
             account_name = self.blob_service_client.account_name
             account_key = self.blob_service_client.credential.account_key
             
-            # Generate SAS token using the exact same syntax
-            sas_token = generate_blob_sas(
-                account_name=account_name,
-                container_name=container_name,
-                blob_name=blob_name,
-                account_key=account_key,
-                permission=BlobSasPermissions(read=True),  # Allow read access
-                expiry=datetime.utcnow() + timedelta(hours=expiry_hours),  # Set expiration
+            # Reuse the token signed for this blob in the current cache bucket
+            sas_token = _cached_sas_token(
+                account_name, account_key, container_name, blob_name, expiry_hours,
+                int(time.time() // SAS_CACHE_SECONDS)
             )
             
             # Construct the full SAS URL
-            sas_url = f"https://{self.blob_service_client.account_name}.blob.core.windows.net/{container_name}/{blob_name}?{sas_token}"
+            sas_url = f"https://{account_name}.blob.core.windows.net/{container_name}/{blob_name}?{sas_token}"
             
             logger.info(f"Generated SAS URL for {container_name}/{blob_name} that expires in {expiry_hours} hours")
             return sas_url
@@ -320,6 +340,15 @@ class AzureStorageService:
         """
         return self.list_blobs(self.destination_container)
 
+_storage_service = None
+
+def get_storage_service():
+    """Return the shared AzureStorageService, creating it on first use"""
+    global _storage_service
+    if _storage_service is None:
+        _storage_service = AzureStorageService()
+    return _storage_service
+
 # Simple test function
 def main():
     """
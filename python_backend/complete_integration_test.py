@@ -1,24 +1,39 @@
 #!/usr/bin/env python3
 """
 Complete Integration Test for Deepgram-Azure integration
-- Gets audio file from Azure Blob Storage using SAS URL
-- Transcribes it directly using Deepgram API (without downloading)
+- Gets audio files from Azure Blob Storage using SAS URLs
+- Transcribes them concurrently using Deepgram API (without downloading)
 - Stores results in SQL database correctly following the database constraints
 """
 
 import os
 import sys
+import asyncio
 import logging
+import queue
+import threading
+import time
+import concurrent.futures
 import uuid
-import json
-import requests
-import tempfile
+from urllib.parse import quote
+import hashlib
+import orjson
+import aiohttp
+import shutil
+import subprocess
 from datetime import datetime, timedelta
 from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
-import pymssql
-
-# Import our DirectTranscribe class
-from direct_transcribe import DirectTranscribe
+from transcription_store import (
+    SOURCE_CONTAINER,
+    blob_path_from_sas_url,
+    build_transcription_result,
+    callback_token,
+    get_cached_transcription,
+    get_sql_connection,
+    hash_listen_params,
+    merge_cache_row,
+    store_in_sql_database,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -31,53 +46,53 @@ STORAGE_CONNECTION_STRING = os.environ.get(
     "AZURE_STORAGE_CONNECTION_STRING", 
     f"DefaultEndpointsProtocol=https;AccountName={STORAGE_ACCOUNT_NAME};AccountKey={STORAGE_ACCOUNT_KEY};EndpointSuffix=core.windows.net"
 )
-SOURCE_CONTAINER = os.environ.get("AZURE_SOURCE_CONTAINER", "shahulin")
 
-# Azure SQL settings
-SQL_SERVER = os.environ.get("AZURE_SQL_SERVER", "callcenter1.database.windows.net")
-SQL_DATABASE = os.environ.get("AZURE_SQL_DATABASE", "call")
-SQL_USER = os.environ.get("AZURE_SQL_USER", "shahul")
-SQL_PASSWORD = os.environ.get("AZURE_SQL_PASSWORD", "apple123!@#")
-SQL_PORT = int(os.environ.get("AZURE_SQL_PORT", "1433"))
+# Shared blob service client (one HTTP pipeline and connection pool for the module)
+BLOB_SVC = BlobServiceClient.from_connection_string(STORAGE_CONNECTION_STRING)
 
 # Deepgram API key
 DEEPGRAM_API_KEY = os.environ.get("DEEPGRAM_API_KEY", "ba94baf7840441c378c58ccd1d5202c38ddc42d8")
 
+# Concurrency settings: blobs transcribed at once, and pooled HTTP connections
+MAX_CONCURRENT_TRANSCRIPTIONS = 8
+HTTP_CONNECTION_LIMIT = 32
 
-# ============================
-# AZURE SQL DATABASE 
-# ============================
-
-def get_sql_connection():
-    """Get a connection to Azure SQL Database"""
-    try:
-        conn = pymssql.connect(
-            server=SQL_SERVER,
-            user=SQL_USER,
-            password=SQL_PASSWORD,
-            database=SQL_DATABASE,
-            port=SQL_PORT
-        )
-        return conn
-    except Exception as e:
-        logger.error(f"Error connecting to SQL database: {str(e)}")
-        raise
+# Deepgram callback settings: blobs larger than the threshold are submitted with a
+# callback to DEEPGRAM_CALLBACK_URL/<fileid> (served by app.py) instead of waiting.
+# DEEPGRAM_CALLBACK_SECRET signs each callback URL and must be set for both processes.
+DEEPGRAM_CALLBACK_URL = os.environ.get("DEEPGRAM_CALLBACK_URL")
+CALLBACK_THRESHOLD_BYTES = 60 * 1024 * 1024
 
 
 # ============================
 # AZURE BLOB STORAGE
 # ============================
 
-def list_audio_blobs(container_name=SOURCE_CONTAINER, limit=5):
-    """List audio blobs in the container"""
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac', '.m4a',
+                    '.MP3', '.WAV', '.OGG', '.FLAC', '.M4A')
+
+
+def list_audio_blobs(container_name=SOURCE_CONTAINER, limit=5, prefix=None):
+    """
+    List audio blobs in the container
+    
+    Args:
+        container_name: Name of the container to list
+        limit: Maximum number of blob names to return
+        prefix: Only list blobs whose names start with this (e.g. 'audio/'),
+            filtered by Azure so non-matching names are never transferred
+    """
     try:
-        blob_service_client = BlobServiceClient.from_connection_string(STORAGE_CONNECTION_STRING)
-        container_client = blob_service_client.get_container_client(container_name)
+        container_client = BLOB_SVC.get_container_client(container_name)
         
+        # Ask Azure for small pages so we stop fetching once we have enough
         blobs = []
-        for blob in container_client.list_blobs():
-            if blob.name.lower().endswith(('.mp3', '.wav', '.ogg', '.flac', '.m4a')):
-                blobs.append(blob.name)
+        for blob in container_client.list_blobs(name_starts_with=prefix, results_per_page=limit * 2):
+            name = blob.name
+            # Lower- and upper-case extensions match directly; only mixed case
+            # (e.g. '.Mp3') needs the last few characters lowercased
+            if name.endswith(AUDIO_EXTENSIONS) or name[-5:].lower().endswith(AUDIO_EXTENSIONS):
+                blobs.append(name)
                 if len(blobs) >= limit:
                     break
         
@@ -110,112 +125,278 @@ def generate_blob_sas_url(blob_name, container_name=SOURCE_CONTAINER, expiry_hou
         return None
 
 
-def download_blob_to_temp_file(blob_sas_url):
-    """Download a blob to a temporary file"""
-    try:
-        # Create a temporary file
-        fd, temp_path = tempfile.mkstemp(suffix='.mp3')
-        os.close(fd)  # Close the file descriptor
-        
-        # Download the blob
-        logger.info(f"Downloading blob to {temp_path}")
-        response = requests.get(blob_sas_url, stream=True)
-        response.raise_for_status()
-        
-        with open(temp_path, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
+# ============================
+# AUDIO PREPROCESSING
+# ============================
+
+PCM_SAMPLE_RATE = 16000
+
+# Telephony audio at or below this rate goes to Deepgram's phonecall model
+PHONECALL_MAX_SAMPLE_RATE = 8000
+
+
+def ffmpeg_pcm_args(sample_rate=PCM_SAMPLE_RATE):
+    """ffmpeg output options: mono 16-bit PCM WAV at sample_rate written to stdout"""
+    return ['-ac', '1', '-ar', str(sample_rate), '-acodec', 'pcm_s16le', '-f', 'wav', 'pipe:1']
+
+
+def probe_sample_rate(source):
+    """
+    Read the sample rate of the first audio stream with ffprobe
+    
+    ffprobe only reads the container header, so this is cheap even for a
+    blob SAS URL.
+    
+    Args:
+        source: Local path or URL that ffprobe can read
         
-        return temp_path
+    Returns:
+        int: Sample rate in Hz, or None if ffprobe is unavailable or fails
+    """
+    if not shutil.which("ffprobe"):
+        return None
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_streams',
+             '-select_streams', 'a:0', source],
+            capture_output=True,
+            check=True,
+            timeout=30
+        )
+        streams = orjson.loads(result.stdout).get('streams') or [{}]
+        return int(streams[0].get('sample_rate', 0)) or None
     except Exception as e:
-        logger.error(f"Error downloading blob: {str(e)}")
+        logger.warning(f"Could not probe sample rate: {str(e)}")
         return None
 
 
+def choose_model(sample_rate):
+    """Pick the Deepgram model for the audio: the phonecall variant for narrowband telephony audio"""
+    if sample_rate and sample_rate <= PHONECALL_MAX_SAMPLE_RATE:
+        return "nova-2-phonecall"
+    return "nova-2"
+
+
+async def _feed_stdin(process, chunks):
+    """Copy an async iterator of bytes into a subprocess's stdin, then close it"""
+    try:
+        async for chunk in chunks:
+            process.stdin.write(chunk)
+            await process.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # ffmpeg exited early; its exit status is checked by the reader
+    finally:
+        process.stdin.close()
+
+
+async def stream_optimized_audio_async(source, chunk_size=64 * 1024, sample_rate=PCM_SAMPLE_RATE):
+    """
+    Yield 16 kHz mono PCM WAV chunks from ffmpeg, for use as an aiohttp request body
+    
+    Args:
+        source: Local path or URL that ffmpeg can read, or an async iterator
+            of audio bytes to feed to ffmpeg on stdin
+        chunk_size: Number of bytes to read from ffmpeg per chunk
+        sample_rate: Output sample rate in Hz
+    """
+    from_pipe = not isinstance(source, str)
+    process = await asyncio.create_subprocess_exec(
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-i', 'pipe:0' if from_pipe else source,
+        *ffmpeg_pcm_args(sample_rate),
+        stdin=asyncio.subprocess.PIPE if from_pipe else None,
+        stdout=asyncio.subprocess.PIPE
+    )
+    feeder = asyncio.create_task(_feed_stdin(process, source)) if from_pipe else None
+    try:
+        while chunk := await process.stdout.read(chunk_size):
+            yield chunk
+        if feeder:
+            await feeder
+    finally:
+        if feeder and not feeder.done():
+            feeder.cancel()
+        if process.returncode is None and not process.stdout.at_eof():
+            process.kill()
+        await process.wait()
+    
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with status {process.returncode}")
+
+
+async def _hash_chunks(chunks, hasher):
+    """Pass byte chunks through unchanged while feeding them to a hashlib object"""
+    async for chunk in chunks:
+        hasher.update(chunk)
+        yield chunk
+
+
 # ============================
 # DEEPGRAM TRANSCRIPTION
 # ============================
 
-def transcribe_audio_file(file_path, api_key=DEEPGRAM_API_KEY, model="nova-2", diarize=True):
+DEEPGRAM_LISTEN_URL = "https://api.deepgram.com/v1/listen"
+
+
+def _listen_params(model, diarize, language):
+    """Build the /v1/listen query parameters - only the features store_in_sql_database uses"""
+    params = {
+        "model": model,
+        "diarize": "true" if diarize else "false",
+        "punctuate": "true",
+        "utterances": "true",
+        "paragraphs": "true",
+        "smart_format": "true"
+    }
+    if language:
+        params["language"] = language
+    else:
+        params["detect_language"] = "true"
+    return params
+
+
+async def _cached_result(blob_path, etag, params_hash, diarize):
+    """Return a result dict built from the transcription cache, or None on a miss"""
+    cached = await asyncio.to_thread(get_cached_transcription, blob_path, etag, params_hash) if etag else None
+    if not cached:
+        return None
+    logger.info(f"Using cached transcription for blob with SHA-256 {cached['sha256']}")
+    result = build_transcription_result(orjson.loads(cached['response_json']), diarize)
+    result.update(sha256=cached['sha256'], blob_path=blob_path, etag=etag, params_hash=params_hash, cached=True)
+    return result
+
+
+async def transcribe_blob_sas_async(session, blob_sas_url, api_key=DEEPGRAM_API_KEY, model=None,
+                                    diarize=True, optimize=True, language="en", by_url=True, callback_url=None):
     """
-    Transcribe an audio file using Deepgram API
+    Transcribe a blob using Deepgram API without downloading it first
+    
+    By default only the SAS URL is sent and Deepgram fetches the audio from
+    Azure itself. With by_url=False the blob body is piped straight from the
+    SAS URL GET into the Deepgram POST in chunks; when ffmpeg is available
+    the audio is downmixed and resampled to 16 kHz mono PCM on the way
+    through, which is much smaller than the source MP3. Several blobs can be
+    transcribed at once over the shared session.
+    
+    Responses are cached in rdt_transcription_cache, and a blob whose path,
+    ETag and parameters match a cached entry is not sent to Deepgram again. The audio's
+    SHA-256 comes from Deepgram's response metadata when it fetches the URL,
+    or is computed as the blob streams through when we upload it ourselves.
+    
+    When callback_url is given and the blob is larger than CALLBACK_THRESHOLD_BYTES,
+    Deepgram is asked to POST the result there and this returns as soon as the
+    request is accepted, with 'pending' set instead of a transcript.
     
     Args:
-        file_path: Path to the audio file
+        session: aiohttp.ClientSession used for the blob and Deepgram requests
+        blob_sas_url: SAS URL of the audio blob
         api_key: Deepgram API key
-        model: Deepgram model to use
+        model: Deepgram model to use; by default chosen from the probed sample rate
         diarize: Whether to enable speaker diarization
+        optimize: Whether to convert the audio to 16 kHz mono PCM first (by_url=False only)
+        language: Language of the audio; pass None to let Deepgram detect it
+        by_url: Whether to let Deepgram fetch the blob from the SAS URL
+        callback_url: URL Deepgram should POST large results to (by_url=True only)
         
     Returns:
-        dict: Result of the transcription
+        dict: Result of the transcription, including 'sha256', 'blob_path',
+            'etag', 'params_hash' and whether it came from the cache
     """
     try:
-        logger.info(f"Transcribing audio file: {file_path}")
-        
-        # Construct the request URL
-        url = "https://api.deepgram.com/v1/listen"
-        
-        # Prepare parameters
-        params = {
-            "model": model,
-            "diarize": "true" if diarize else "false",
-            "punctuate": "true",
-            "utterances": "true",
-            "paragraphs": "true",
-            "filler_words": "true",
-            "detect_language": "true",
-            "smart_format": "true"
-        }
-        
-        # Prepare headers
-        headers = {
-            "Authorization": f"Token {api_key}",
-            "Content-Type": "audio/mpeg"  # Assuming MP3 format
-        }
-        
-        # Open the file and send the request
-        with open(file_path, 'rb') as file:
-            response = requests.post(url, params=params, headers=headers, data=file)
-        
-        # Check if the request was successful
-        response.raise_for_status()
-        
-        # Parse the response
-        result = response.json()
-        
-        # Check if we have valid results
-        if 'results' not in result:
-            return {
-                'success': False,
-                'error': 'No results in Deepgram response',
-                'response_data': result
-            }
-        
-        # Extract the basic transcript
-        basic_transcript = ""
-        if 'results' in result and 'channels' in result['results'] and len(result['results']['channels']) > 0:
-            if 'alternatives' in result['results']['channels'][0] and len(result['results']['channels'][0]['alternatives']) > 0:
-                basic_transcript = result['results']['channels'][0]['alternatives'][0].get('transcript', '')
-        
-        # Extract speaker transcript if diarization is enabled
-        speaker_transcript = ""
-        if diarize and 'results' in result and 'utterances' in result['results']:
-            utterances = result['results']['utterances']
-            speaker_segments = []
+        logger.info(f"Transcribing blob from SAS URL: {blob_sas_url[:60]}...")
+        
+        # Match the model to the audio (narrowband telephony vs. wideband)
+        sample_rate = None
+        if model is None:
+            sample_rate = await asyncio.to_thread(probe_sample_rate, blob_sas_url)
+            model = choose_model(sample_rate)
+        params = _listen_params(model, diarize, language)
+        
+        optimizing = not by_url and optimize and shutil.which("ffmpeg")
+        if optimizing:
+            # Keep narrowband audio at its own rate instead of upsampling it, and
+            # tell Deepgram the format of the PCM we send so it skips sniffing it
+            pcm_rate = min(sample_rate or PCM_SAMPLE_RATE, PCM_SAMPLE_RATE)
+            params.update(encoding="linear16", sample_rate=pcm_rate)
+        
+        params_hash = hash_listen_params(params)
+        blob_path = blob_path_from_sas_url(blob_sas_url)
+        hasher = None
+        
+        if by_url:
+            # Deepgram pulls the audio from Azure; we only need the blob's ETag
+            async with session.head(blob_sas_url) as blob_response:
+                blob_response.raise_for_status()
+                etag = blob_response.headers.get("ETag", "")
+                blob_size = int(blob_response.headers.get("Content-Length", 0))
             
-            for utterance in utterances:
-                speaker = utterance.get('speaker', 'unknown')
-                text = utterance.get('transcript', '')
-                speaker_segments.append(f"Speaker {speaker}: {text}")
+            # Skip Deepgram if this version of the blob was already transcribed
+            cached = await _cached_result(blob_path, etag, params_hash, diarize)
+            if cached:
+                return cached
             
-            speaker_transcript = "\n".join(speaker_segments)
+            # Large files go through a callback so we don't hold a request open (or hit a 408)
+            use_callback = callback_url and blob_size > CALLBACK_THRESHOLD_BYTES
+            if use_callback:
+                params = {**params, "callback": callback_url}
+            
+            headers = {
+                "Authorization": f"Token {api_key}",
+                "Content-Type": "application/json"
+            }
+            async with session.post(DEEPGRAM_LISTEN_URL, params=params, headers=headers,
+                                    data=orjson.dumps({"url": blob_sas_url})) as response:
+                response.raise_for_status()
+                body = await response.read()
+            
+            if use_callback:
+                request_id = orjson.loads(body).get('request_id')
+                logger.info(f"Submitted {blob_size} byte blob with callback, request ID: {request_id}")
+                return {'success': True, 'pending': True, 'request_id': request_id}
+        else:
+            async with session.get(blob_sas_url) as blob_response:
+                blob_response.raise_for_status()
+                etag = blob_response.headers.get("ETag", "")
+                
+                # Skip Deepgram if this version of the blob was already transcribed
+                cached = await _cached_result(blob_path, etag, params_hash, diarize)
+                if cached:
+                    return cached
+                
+                # Hash the blob content on its way to Deepgram
+                hasher = hashlib.sha256()
+                audio = _hash_chunks(blob_response.content.iter_chunked(64 * 1024), hasher)
+                
+                if optimizing:
+                    # Pipe the blob through ffmpeg and stream its PCM output to Deepgram
+                    content_type = "audio/wav"
+                    audio = stream_optimized_audio_async(audio, sample_rate=pcm_rate)
+                else:
+                    # Use the blob's content type when Azure has one recorded
+                    content_type = blob_response.headers.get("Content-Type", "")
+                    if not content_type.startswith("audio/"):
+                        content_type = "audio/mpeg"  # Assuming MP3 format
+                
+                headers = {
+                    "Authorization": f"Token {api_key}",
+                    "Content-Type": content_type
+                }
+                
+                # Send the audio to Deepgram as it arrives (chunked transfer)
+                async with session.post(DEEPGRAM_LISTEN_URL, params=params, headers=headers,
+                                        data=audio) as response:
+                    response.raise_for_status()
+                    body = await response.read()
         
-        return {
-            'success': True,
-            'basic_transcript': basic_transcript,
-            'speaker_transcript': speaker_transcript,
-            'response_data': result
-        }
+        # Parse the response
+        response_data = orjson.loads(body)
+        if hasher:
+            sha256 = hasher.hexdigest()
+        else:
+            # Deepgram reports the SHA-256 of the audio it fetched
+            sha256 = (response_data.get('metadata') or {}).get('sha256', '')
+        result = build_transcription_result(response_data, diarize)
+        result.update(sha256=sha256, blob_path=blob_path, etag=etag, params_hash=params_hash, cached=False)
+        return result
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
         return {
@@ -225,231 +406,202 @@ def transcribe_audio_file(file_path, api_key=DEEPGRAM_API_KEY, model="nova-2", d
 
 
 # ============================
-# DATABASE STORAGE FUNCTION
+# SQL WRITER THREAD
 # ============================
 
-def store_in_sql_database(fileid, blob_name, transcription_result):
-    """Store transcription results in Azure SQL database"""
-    try:
-        if not transcription_result['success']:
-            logger.error(f"Cannot store unsuccessful transcription: {transcription_result['error']}")
-            return False, {"error": transcription_result['error']}
-        
-        # Extract data from transcription result
-        basic_transcript = transcription_result['basic_transcript']
-        speaker_transcript = transcription_result['speaker_transcript']
-        response_data = transcription_result['response_data']
-        
-        # Connect to database
-        conn = get_sql_connection()
-        cursor = conn.cursor()
-        
-        # First, insert a record into rdt_assets including transcription
-        logger.info("Inserting asset record with transcription")
-        
-        # Log the transcription content we're about to store
-        logger.info(f"TRANSCRIPTION: {basic_transcript[:100]}..." if len(basic_transcript) > 100 else f"TRANSCRIPTION: {basic_transcript}")
-        
-        cursor.execute("""
-            INSERT INTO rdt_assets (
-                fileid, 
-                filename, 
-                source_path, 
-                destination_path, 
-                file_size,
-                upload_date,
-                status,
-                created_dt,
-                transcription
-            )
-            VALUES (
-                %s, 
-                %s, 
-                %s, 
-                %s, 
-                %s,
-                %s,
-                %s,
-                %s,
-                %s
-            )
-        """, (
-            fileid,
-            blob_name,
-            SOURCE_CONTAINER,  # Source container - use global variable
-            None,              # Destination path
-            0,                 # File size (not available)
-            datetime.now(),    # Upload date
-            "completed",       # Status
-            datetime.now(),    # Created date
-            basic_transcript   # Transcription text
-        ))
-        
-        # Commit immediately after inserting the asset record to ensure it's saved
-        # even if subsequent processing fails
-        conn.commit()
-        logger.info("Asset record with transcription inserted and committed successfully")
-        
-        # Insert audio metadata
-        logger.info("Inserting audio metadata")
-        cursor.execute("""
-            EXEC RDS_InsertAudioMetadata
-            @fileid = %s,
-            @request_id = %s,
-            @sha256 = %s,
-            @created_timestamp = %s,
-            @audio_duration = %s,
-            @confidence = %s,
-            @status = %s
-        """, (
-            fileid,
-            f"request_{uuid.uuid4().hex[:8]}",  # Generate a request ID
-            "0000000000000000000000000000000000000000000000000000000000000000",  # Placeholder for SHA256
-            datetime.now().isoformat(),
-            0.0,  # Audio duration (not available)
-            0.9,  # Default confidence
-            "completed"
-        ))
-        
-        # Extract and insert paragraphs/utterances
-        para_count = 0
-        sent_count = 0
-        
+WRITER_BATCH_SIZE = 32
+WRITER_MAX_WAIT = 0.5  # Seconds to wait for more results before writing a batch
+
+
+class SqlWriter:
+    """
+    Background thread that stores transcription results in batches
+    
+    pymssql is blocking, so completed results are queued here rather than
+    written from the event loop. A single thread drains up to batch_size
+    results, or whatever arrives within max_wait seconds, and writes them
+    over one connection with one commit. Each file is written under its own
+    savepoint, so one failed file is rolled back without losing the others. The thread opens its connection as
+    soon as it starts, while transcription is still running.
+    """
+    
+    def __init__(self, batch_size=WRITER_BATCH_SIZE, max_wait=WRITER_MAX_WAIT):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="sql-writer", daemon=True)
+        self.thread.start()
+    
+    def submit(self, fileid, blob_name, transcription_result):
+        """
+        Queue a transcription result for storage
+        
+        Returns:
+            concurrent.futures.Future: Resolves to (success, result_info)
+        """
+        future = concurrent.futures.Future()
+        self.queue.put((fileid, blob_name, transcription_result, future))
+        return future
+    
+    def close(self):
+        """Write anything still queued and stop the thread"""
+        self.queue.put(None)
+        self.thread.join()
+    
+    def _run(self):
+        # Log in to SQL while the first transcriptions are still in flight, so the
+        # connection handshake overlaps with Deepgram rather than delaying the first batch
         try:
-            # Process paragraphs - adding more detailed debugging
-            logger.info(f"Checking paragraphs structure: 'results' in response_data: {'results' in response_data}")
-            logger.info(f"Available keys in results: {list(response_data['results'].keys()) if 'results' in response_data else []}")
-            
-            # Write the entire response to a file for inspection
-            with open(f"deepgram_response_{fileid}.json", "w") as f:
-                json.dump(response_data, f, indent=2)
-            logger.info(f"Wrote complete response to deepgram_response_{fileid}.json")
-            
-            if 'results' in response_data:
-                logger.info(f"'paragraphs' in response_data['results']: {'paragraphs' in response_data['results']}")
-                if 'paragraphs' in response_data['results']:
-                    paragraphs_data = response_data['results']['paragraphs']
-                    logger.info(f"Paragraphs data structure: {json.dumps(paragraphs_data, indent=2)[:500]}")
-                
-                # Check for utterances which we can use as an alternative
-                if 'utterances' in response_data['results']:
-                    utterances = response_data['results']['utterances']
-                    logger.info(f"Found {len(utterances)} utterances that can be used instead of paragraphs")
-                    logger.info(f"First utterance sample: {json.dumps(utterances[0], indent=2) if utterances else 'No utterances'}")
-                    
-            # Process paragraphs if available, otherwise use utterances
-            paragraphs = []
-            
-            if 'results' in response_data and 'paragraphs' in response_data['results']:
-                # If paragraphs feature is available
-                paragraphs = response_data['results']['paragraphs'].get('paragraphs', [])
-                logger.info(f"Found {len(paragraphs)} paragraphs from paragraphs feature")
-                
-            elif 'results' in response_data and 'utterances' in response_data['results']:
-                # Use utterances as paragraphs if paragraphs feature is not available
-                utterances = response_data['results']['utterances']
-                logger.info(f"Using {len(utterances)} utterances as paragraphs")
-                # Convert utterances to paragraph format
-                for i, utterance in enumerate(utterances):
-                    paragraphs.append({
-                        'text': utterance.get('transcript', ''),
-                        'start': utterance.get('start', 0.0),
-                        'end': utterance.get('end', 0.0),
-                        'speaker': utterance.get('speaker', 0)
-                    })
-            
-            # Process the paragraphs (either from paragraphs feature or converted from utterances)
-            for idx, paragraph in enumerate(paragraphs):
-                para_text = paragraph.get('text', '')
-                para_start = paragraph.get('start', 0.0)
-                para_end = paragraph.get('end', 0.0)
-                para_speaker = paragraph.get('speaker', 0)
-                logger.info(f"Processing paragraph {idx}: speaker={para_speaker}, length={len(para_text)}, start={para_start}, end={para_end}")
-                
-                # Insert paragraph and get paragraph_id
-                cursor.execute("""
-                    DECLARE @paragraph_id INT;
-                    EXEC RDS_InsertParagraph
-                    @fileid = %s,
-                    @paragraph_idx = %s,
-                    @text = %s,
-                    @start_time = %s,
-                    @end_time = %s,
-                    @speaker = %s,
-                    @num_words = %s,
-                    @paragraph_id = @paragraph_id OUTPUT;
-                    SELECT @paragraph_id;
-                    """, (
-                        fileid,
-                        idx,
-                        para_text,
-                        para_start,
-                        para_end,
-                        str(para_speaker),
-                        len(para_text.split())
-                    ))
-                    
-                # Get the paragraph_id returned from the stored procedure
-                paragraph_id = cursor.fetchone()[0]
-                para_count += 1
-                
-                # Process sentences in this paragraph
-                # Here we just split by period as a simple approach,
-                # a real implementation would use the actual sentences from Deepgram
-                sentences = para_text.split('.')
-                for sent_idx, sentence in enumerate(sentences):
-                    if not sentence.strip():
-                        continue
-                        
-                    # For simplicity, distribute time evenly across sentences
-                    sent_duration = (para_end - para_start) / max(1, len(sentences))
-                    sent_start = para_start + (sent_idx * sent_duration)
-                    sent_end = sent_start + sent_duration
-                    
-                    cursor.execute("""
-                    EXEC RDS_InsertSentence
-                    @fileid = %s,
-                    @paragraph_id = %s,
-                    @sentence_idx = %s,
-                    @text = %s,
-                    @start_time = %s,
-                    @end_time = %s
-                    """, (
-                        fileid,
-                        paragraph_id,
-                        sent_idx,
-                        sentence.strip() + '.',
-                        sent_start,
-                        sent_end
-                    ))
-                    sent_count += 1
+            with get_sql_connection():
+                pass
         except Exception as e:
-            logger.error(f"Error processing paragraphs/sentences: {str(e)}")
-            # Continue with the rest of the function, don't throw exception
+            logger.warning(f"Could not pre-open SQL connection: {str(e)}")
         
-        # Make sure any remaining changes are committed and connection is closed properly
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                return
+            
+            # Collect more results until the batch is full or max_wait has passed
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._write_batch(batch)
+    
+    def _write_batch(self, batch):
+        logger.info(f"Writing {len(batch)} transcription results in one transaction")
+        results = []
         try:
-            conn.commit()
-            logger.info("Final transaction commit successful")
+            with get_sql_connection() as conn:
+                cursor = conn.cursor()
+                for n, (fileid, blob_name, transcription_result, future) in enumerate(batch):
+                    # Each file gets a savepoint, so a failed file is undone without
+                    # discarding the files written before it in the same transaction
+                    savepoint = f"file_{n}"
+                    cursor.execute(f"SAVE TRANSACTION {savepoint}")
+                    try:
+                        result = store_in_sql_database(fileid, blob_name, transcription_result,
+                                                       parsed=transcription_result.get('parsed'), conn=conn)
+                    except Exception as e:
+                        result = (False, {"error": str(e)})
+                    if not result[0]:
+                        logger.warning(f"Rolling back partial writes for {fileid}")
+                        cursor.execute(f"ROLLBACK TRANSACTION {savepoint}")
+                    elif transcription_result.get('sha256'):
+                        # Cache in the same transaction, so a cache hit implies the results are stored
+                        try:
+                            merge_cache_row(cursor, transcription_result['sha256'], transcription_result['params_hash'],
+                                            transcription_result['blob_path'], transcription_result['etag'],
+                                            transcription_result['response_data'])
+                        except Exception as e:
+                            logger.warning(f"Failed to cache transcription for {fileid}: {str(e)}")
+                    results.append((future, result))
+                conn.commit()
         except Exception as e:
-            logger.error(f"Error in final commit: {str(e)}")
-        finally:
-            cursor.close()
-            conn.close()
-            logger.info("Database connection closed")
+            logger.error(f"Error writing batch to SQL database: {str(e)}")
+            results = [(future, (False, {"error": str(e)})) for *_, future in batch]
         
-        logger.info(f"Successfully stored transcription results in SQL database. Paragraphs: {para_count}, Sentences: {sent_count}")
-        return True, {"paragraphs": para_count, "sentences": sent_count}
-    
-    except Exception as e:
-        logger.error(f"Error storing in SQL database: {str(e)}")
-        return False, {"error": str(e)}
+        for future, result in results:
+            future.set_result(result)
 
 
 # ============================
 # MAIN FUNCTION
 # ============================
 
+async def process_blob(session, semaphore, writer, blob_name):
+    """
+    Transcribe one blob and store the results
+    
+    Args:
+        session: Shared aiohttp.ClientSession
+        semaphore: Limits how many transcriptions run at once
+        writer: SqlWriter that stores the results
+        blob_name: Name of the blob in the source container
+        
+    Returns:
+        tuple: (success, result_info)
+    """
+    # Generate SAS URL for the blob
+    blob_sas_url = generate_blob_sas_url(blob_name)
+    if not blob_sas_url:
+        logger.error(f"Failed to generate SAS URL for {blob_name}.")
+        return False, "Failed to generate SAS URL"
+    
+    # Create a unique file ID
+    fileid = f"test_{uuid.uuid4().hex[:16]}"
+    logger.info(f"Using file ID {fileid} for blob {blob_name}")
+    
+    # app.py stores the result when Deepgram calls back for large files; the
+    # signed token is what lets it tell Deepgram's call apart from anyone else's
+    callback_url = None
+    token = callback_token(fileid, blob_name)
+    if DEEPGRAM_CALLBACK_URL and token:
+        callback_url = (f"{DEEPGRAM_CALLBACK_URL.rstrip('/')}/{fileid}"
+                        f"?blob_name={quote(blob_name)}&token={token}")
+    elif DEEPGRAM_CALLBACK_URL:
+        logger.warning("DEEPGRAM_CALLBACK_SECRET is not set; waiting for large files instead of using callbacks")
+    
+    async with semaphore:
+        # Transcribe the audio directly from the SAS URL (without downloading)
+        transcription_result = await transcribe_blob_sas_async(session, blob_sas_url, callback_url=callback_url)
+    
+    if not transcription_result['success']:
+        logger.error(f"Transcription failed for {blob_name}: {transcription_result['error']}")
+        return False, transcription_result['error']
+    
+    if transcription_result.get('pending'):
+        logger.info(f"{blob_name} will be stored when Deepgram calls back (request {transcription_result['request_id']})")
+        return True, {"pending": True, "request_id": transcription_result['request_id']}
+    
+    if transcription_result['cached']:
+        # The cached response was stored in the database when it was first transcribed
+        logger.info(f"{blob_name} was already transcribed and stored; skipping Deepgram and SQL writes")
+        return True, {"cached": True, "sha256": transcription_result['sha256']}
+    
+    # Log some information about the transcription
+    logger.info(f"Transcription of {blob_name} completed. Transcript length: {len(transcription_result['basic_transcript'])}")
+    
+    # Hand the results to the SQL writer thread and wait for its batch to commit
+    success, storage_result = await asyncio.wrap_future(
+        writer.submit(fileid, blob_name, transcription_result)
+    )
+    
+    if success:
+        logger.info(f"Stored {blob_name} successfully! Storage result: {storage_result}")
+    else:
+        logger.error(f"Failed to store transcription results for {blob_name}: {storage_result}")
+    return success, storage_result
+
+
+async def run(blobs):
+    """Transcribe and store all blobs concurrently over one pooled HTTP session"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSCRIPTIONS)
+    connector = aiohttp.TCPConnector(limit=HTTP_CONNECTION_LIMIT)
+    writer = SqlWriter()
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(
+                *(process_blob(session, semaphore, writer, blob_name) for blob_name in blobs),
+                return_exceptions=True
+            )
+    finally:
+        await asyncio.to_thread(writer.close)
+
+
 def main():
     """Main function to run the test"""
     
@@ -462,66 +614,17 @@ def main():
             logger.error("No audio blobs found in the container.")
             return
         
-        # Use the first audio blob for testing
-        blob_name = blobs[0]
-        logger.info(f"Using blob for testing: {blob_name}")
-        
-        # Generate SAS URL for the blob
-        blob_sas_url = generate_blob_sas_url(blob_name)
-        if not blob_sas_url:
-            logger.error("Failed to generate SAS URL.")
-            return
+        logger.info(f"Processing {len(blobs)} blobs: {blobs}")
+        results = asyncio.run(run(blobs))
         
-        # Create a unique file ID
-        fileid = f"test_{uuid.uuid4().hex[:16]}"
-        logger.info(f"Using file ID: {fileid}")
+        succeeded = 0
+        for blob_name, result in zip(blobs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing {blob_name}: {str(result)}")
+            elif result[0]:
+                succeeded += 1
         
-        try:
-            # Initialize the DirectTranscribe class
-            direct_transcriber = DirectTranscribe()
-            
-            # Transcribe the audio file directly from the SAS URL
-            logger.info("Transcribing audio directly from SAS URL (without downloading)")
-            dg_response = direct_transcriber.transcribe_audio(blob_sas_url, DEEPGRAM_API_KEY)
-            
-            # Process the Deepgram response to match the expected format for storage
-            transcription_result = {
-                'success': True,
-                'basic_transcript': "",
-                'speaker_transcript': "",
-                'response_data': dg_response
-            }
-            
-            # Extract the basic transcript
-            if 'results' in dg_response and 'channels' in dg_response['results'] and len(dg_response['results']['channels']) > 0:
-                if 'alternatives' in dg_response['results']['channels'][0] and len(dg_response['results']['channels'][0]['alternatives']) > 0:
-                    transcription_result['basic_transcript'] = dg_response['results']['channels'][0]['alternatives'][0].get('transcript', '')
-            
-            # Extract speaker transcript if diarization is enabled
-            if 'results' in dg_response and 'utterances' in dg_response['results']:
-                utterances = dg_response['results']['utterances']
-                speaker_segments = []
-                
-                for utterance in utterances:
-                    speaker = utterance.get('speaker', 'unknown')
-                    text = utterance.get('transcript', '')
-                    speaker_segments.append(f"Speaker {speaker}: {text}")
-                
-                transcription_result['speaker_transcript'] = "\n".join(speaker_segments)
-            
-            # Log some information about the transcription
-            logger.info(f"Transcription completed. Transcript length: {len(transcription_result['basic_transcript'])}")
-            
-            # Store the results in the SQL database
-            success, storage_result = store_in_sql_database(fileid, blob_name, transcription_result)
-            
-            if success:
-                logger.info(f"Integration test completed successfully! Storage result: {storage_result}")
-            else:
-                logger.error(f"Failed to store transcription results: {storage_result}")
-        
-        except Exception as e:
-            logger.error(f"Error in direct transcription process: {str(e)}")
+        logger.info(f"Integration test finished: {succeeded}/{len(blobs)} blobs processed successfully")
     
     except Exception as e:
         logger.error(f"Error in main function: {str(e)}")
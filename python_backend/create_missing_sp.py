@@ -4,7 +4,7 @@ Create missing stored procedures for Deepgram analytics platform
 import os
 import logging
 import pymssql
-from azure_sql_service import AzureSQLService
+from azure_sql_service import get_sql_service
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -73,7 +73,7 @@ def main():
     """Main function to create missing stored procedures"""
     try:
         # Get SQL connection
-        sql_service = AzureSQLService()
+        sql_service = get_sql_service()
         conn = sql_service._get_connection()
         
         # Create stored procedures
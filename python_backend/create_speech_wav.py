@@ -3,8 +3,10 @@
 Create WAV files with actual speech content for testing Deepgram
 """
 import os
+import functools
 import logging
 import numpy as np
+import struct
 import wave
 import tempfile
 
@@ -12,7 +14,46 @@ import tempfile
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def generate_speech_like_signal(duration=2.0):
+@functools.lru_cache(maxsize=8)
+def _frame_envelope(frame_length, sample_rate):
+    """Attack/decay envelope applied to each frame, built once per frame length"""
+    envelope = np.ones(frame_length)
+    attack_samples = min(int(0.01 * sample_rate), frame_length // 10)
+    decay_samples = min(int(0.01 * sample_rate), frame_length // 10)
+    
+    if attack_samples > 0:
+        envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
+    if decay_samples > 0 and frame_length - decay_samples > 0:
+        envelope[frame_length - decay_samples:] = np.linspace(1, 0, decay_samples)
+    
+    # Shared between calls, so make sure nobody modifies it in place
+    envelope.flags.writeable = False
+    return envelope
+
+def _speech_frames(rng, n_frames, frame_length, sample_rate, freqs):
+    """
+    Generate a batch of speech-like frames in one pass
+    
+    Returns:
+        np.ndarray: Array of shape (n_frames, frame_length)
+    """
+    # Choose 3 different vowel-like frequencies for every frame
+    picks = np.argsort(rng.random((n_frames, len(freqs))), axis=1)[:, :3]
+    frame_freqs = np.asarray(freqs)[picks][:, :, None]
+    amplitudes = rng.uniform(0.2, 0.8, (n_frames, 3, 1))
+    
+    # Mix the frequency components of all frames at once: (n_frames, 3, frame_length) -> (n_frames, frame_length)
+    t = np.arange(frame_length) / sample_rate
+    frames = (amplitudes * np.sin(2 * np.pi * frame_freqs * t)).sum(axis=1)
+    
+    # Add some noise to make it more realistic
+    frames += 0.05 * rng.standard_normal(frames.shape)
+    
+    # The envelope is the same for every frame, so it broadcasts across the batch
+    frames *= _frame_envelope(frame_length, sample_rate)
+    return frames
+
+def generate_speech_like_signal(duration=2.0, seed=None):
     """
     Generate a signal that has speech-like characteristics
     This creates a more complex waveform than a simple sine wave,
@@ -20,50 +61,23 @@ def generate_speech_like_signal(duration=2.0):
     
     Args:
         duration (float): Duration of the audio signal in seconds (default: 2)
+        seed (int): Seed for the random generator, for a reproducible signal (default: None)
     """
     # Parameters
     sample_rate = 16000  # Standard speech sample rate
     total_samples = int(sample_rate * duration)
+    frame_length = sample_rate // 8
     
-    # Generate a frame-by-frame signal with frequency shifts to mimic speech
-    signal = np.zeros(total_samples, dtype=np.float32)
+    # Frequencies that commonly occur in speech; each frame mixes a few, like vowels
+    freqs = [240, 500, 1000, 2000]
+    rng = np.random.default_rng(seed)
     
-    # Generate several frequency components that shift over time (like vowels in speech)
-    freqs = [240, 500, 1000, 2000]  # Frequencies that commonly occur in speech
-    
-    for i in range(0, total_samples, sample_rate // 8):
-        # Choose random vowel-like frequencies for this frame
-        frame_freqs = np.random.choice(freqs, size=3, replace=False)
-        frame_length = min(sample_rate // 8, total_samples - i)
-        
-        # Time array for this frame
-        t = np.arange(frame_length) / sample_rate
-        
-        # Generate a mixture of frequencies with varying amplitudes
-        frame = np.zeros(frame_length)
-        for freq in frame_freqs:
-            # Add a frequency component with random amplitude
-            amplitude = np.random.uniform(0.2, 0.8)
-            frame += amplitude * np.sin(2 * np.pi * freq * t)
-        
-        # Add some noise to make it more realistic
-        noise = np.random.normal(0, 0.05, frame_length)
-        frame += noise
-        
-        # Apply a simple envelope to the frame (attack and decay)
-        envelope = np.ones(frame_length)
-        attack_samples = min(int(0.01 * sample_rate), frame_length // 10)
-        decay_samples = min(int(0.01 * sample_rate), frame_length // 10)
-        
-        if attack_samples > 0:
-            envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
-        if decay_samples > 0 and frame_length - decay_samples > 0:
-            envelope[frame_length - decay_samples:] = np.linspace(1, 0, decay_samples)
-            
-        frame *= envelope
-        
-        # Add to our signal
-        signal[i:i+frame_length] = frame
+    # Build all full frames in one batch, plus a shorter last frame if needed
+    n_frames, tail_length = divmod(total_samples, frame_length)
+    parts = [_speech_frames(rng, n_frames, frame_length, sample_rate, freqs).ravel()]
+    if tail_length:
+        parts.append(_speech_frames(rng, 1, tail_length, sample_rate, freqs).ravel())
+    signal = np.concatenate(parts).astype(np.float32)
     
     # Normalize to prevent clipping
     max_val = np.max(np.abs(signal))
@@ -74,23 +88,24 @@ def generate_speech_like_signal(duration=2.0):
     return (signal * 32767).astype(np.int16)
 
 def save_wav(signal, filename, sample_rate=16000):
-    """Save a signal to a WAV file"""
-    with wave.open(filename, 'wb') as wav_file:
-        # Set parameters
-        nchannels = 1  # mono
-        sampwidth = 2  # 16-bit
-        framerate = sample_rate
-        nframes = len(signal)
-        comptype = 'NONE'
-        compname = 'not compressed'
-        
-        # Set the parameters
-        wav_file.setparams((nchannels, sampwidth, framerate, nframes, comptype, compname))
-        
-        # Write the frames
-        wav_file.writeframes(signal.tobytes())
+    """Save a 16-bit mono signal to a WAV file"""
+    # Write the samples straight from the array's buffer rather than copying them to bytes first
+    samples = np.ascontiguousarray(signal, dtype='<i2')
+    data_size = samples.nbytes
+    
+    # 44-byte canonical PCM header: RIFF chunk, fmt chunk (mono, 16-bit), then the data chunk
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', data_size
+    )
+    
+    with open(filename, 'wb') as wav_file:
+        wav_file.write(header)
+        wav_file.write(memoryview(samples))
     
-    logger.info(f"Saved WAV file to {filename} ({os.path.getsize(filename)} bytes)")
+    logger.info(f"Saved WAV file to {filename} ({len(header) + data_size} bytes)")
     return filename
 
 def create_speech_wav(output_filename=None, duration=2.0):
@@ -37,7 +37,7 @@ def check_table_exists(conn, table_name):
     """Check if a table exists in the database"""
     cursor = conn.cursor()
     try:
-        cursor.execute(f"SELECT COUNT(*) FROM sys.tables WHERE name = '{table_name}'")
+        cursor.execute("SELECT COUNT(*) FROM sys.tables WHERE name = %s", (table_name,))
         result = cursor.fetchone()
         exists = result[0] > 0
         logger.info(f"Table {table_name} exists: {exists}")
@@ -6,76 +6,314 @@ with Deepgram, supporting both local files and Azure Storage blobs via SAS URLs.
 """
 
 import os
+import asyncio
+import subprocess
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import aiohttp
 import requests
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
-import json
+import orjson
+from http_session import LISTEN_TIMEOUT, SESSION, aio_session_scope, get_aio_session
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def transcribe_with_listen_rest(audio_url: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+# (connect, read) timeouts; long recordings can take minutes to transcribe
+REQUEST_TIMEOUT = (5, 300)
+
+DEEPGRAM_LISTEN_URL = "https://api.deepgram.com/v1/listen"
+
+DEFAULT_OPTIONS = {
+    "model": "nova-2", 
+    "smart_format": True,
+    "diarize": True,
+    "detect_language": True,
+    "punctuate": True,
+    "utterances": True
+}
+
+# In-process cache of Deepgram responses keyed by blob path + ETag + options. Transcription
+# is deterministic for the same audio and options, so a hit skips Deepgram entirely.
+# Raw response bodies are kept zlib-compressed since the JSON compresses well.
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = 24 * 3600
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _cache_key(audio_url: str, etag: str, options: Dict[str, Any]) -> str:
     """
-    Transcribe audio using Deepgram's listen.rest API with a Blob SAS URL.
+    Cache key for a blob version and set of transcription options
+    
+    ETags are only unique within one blob, so the blob's URL is part of the key.
+    Its SAS query string is left out, since each caller signs its own token.
+    """
+    parts = urlsplit(audio_url)
+    blob = f"{parts.netloc}{parts.path}\n{etag}\n".encode()
+    return hashlib.sha1(blob + orjson.dumps(options, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    """Return a fresh copy of the cached response for key, or None"""
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, compressed = entry
+        if expires_at < time.monotonic():
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+    return orjson.loads(zlib.decompress(compressed))
+
+def _cache_put(key: str, body: bytes) -> None:
+    """Cache a raw Deepgram response body, evicting the least recently used entries"""
+    entry = (time.monotonic() + CACHE_TTL_SECONDS, zlib.compress(body, 1))
+    with _response_cache_lock:
+        _response_cache[key] = entry
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+
+async def _blob_etag(session: aiohttp.ClientSession, audio_url: str) -> Optional[str]:
+    """HEAD the SAS URL for the blob's ETag; None if it is unavailable"""
+    try:
+        async with session.head(audio_url) as response:
+            return response.headers.get("ETag") if response.status == 200 else None
+    except aiohttp.ClientError as e:
+        logger.warning(f"Could not read ETag for {audio_url[:60]}...: {str(e)}")
+        return None
+
+def _blob_etag_sync(audio_url: str) -> Optional[str]:
+    """Blocking version of _blob_etag"""
+    try:
+        response = SESSION.head(audio_url, timeout=REQUEST_TIMEOUT)
+        return response.headers.get("ETag") if response.status_code == 200 else None
+    except requests.RequestException as e:
+        logger.warning(f"Could not read ETag for {audio_url[:60]}...: {str(e)}")
+        return None
+
+# Only this much of an error body is read and logged; gateway error pages can be hundreds of KB
+ERROR_BODY_LIMIT = 1024
+
+def _error_message(status: int, body: bytes, request_id: Optional[str]) -> str:
+    """Format a failed Deepgram response from the truncated body and its request id"""
+    return (f"Deepgram API request failed: {status} (request id {request_id}) - "
+            f"{body[:ERROR_BODY_LIMIT].decode('utf-8', 'replace')}")
+
+# Requests currently being sent to Deepgram, keyed like the response cache. A second
+# caller for the same audio and options waits on the first request instead of repeating it.
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def _post_listen_once(session: aiohttp.ClientSession, key: str, headers: Dict[str, str],
+                            payload: Dict[str, Any]) -> Tuple[int, bytes, Optional[str]]:
+    """
+    POST a listen request, sharing it with concurrent callers that use the same key
+    
+    Returns:
+        tuple: (HTTP status, raw response body, Deepgram request id); only the
+            start of the body is read for an error response
+    """
+    while (pending := _inflight.get(key)) is not None:
+        logger.info("Identical transcription already in flight, waiting for its response")
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # The caller that sent the shared request was cancelled; send it
+            # again ourselves unless this task is being cancelled as well
+            if not pending.cancelled() or asyncio.current_task().cancelling():
+                raise
+    
+    future = asyncio.get_running_loop().create_future()
+    # Mark a failure as retrieved even when nobody else is waiting on it
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _inflight[key] = future
+    try:
+        async with session.post(DEEPGRAM_LISTEN_URL, headers=headers, data=orjson.dumps(payload),
+                                timeout=LISTEN_TIMEOUT) as response:
+            if response.status == 200:
+                body = await response.read()
+            else:
+                body = await response.content.read(ERROR_BODY_LIMIT)
+            result = (response.status, body, response.headers.get("dg-request-id"))
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        # Cancellation belongs to this caller only; waiters see a cancelled future and retry
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        del _inflight[key]
+
+# Downmix/resample to what Deepgram transcribes internally: 16 kHz mono 16-bit PCM WAV on stdout
+FFMPEG_OPTIMIZE_ARGS = ["-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", "-f", "wav", "pipe:1"]
+
+def _optimize_audio(file_path: str) -> Optional[bytes]:
+    """
+    Convert a local audio file to 16 kHz mono PCM WAV with ffmpeg.
     
     Args:
-        audio_url: The SAS URL to the audio file in Azure Blob Storage
-        options: Optional dictionary of transcription options
+        file_path: Path to the local audio file
         
     Returns:
-        dict: The complete Deepgram response
+        bytes: The WAV data, or None if ffmpeg is unavailable or fails
     """
-    # Get Deepgram API key from environment
+    try:
+        return subprocess.run(["ffmpeg", "-v", "error", "-i", file_path, *FFMPEG_OPTIMIZE_ARGS],
+                              check=True, capture_output=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Could not optimize {file_path} with ffmpeg, sending it as is: {str(e)}")
+        return None
+
+async def _optimize_audio_async(file_path: str) -> Optional[bytes]:
+    """Non-blocking version of _optimize_audio"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-v", "error", "-i", file_path, *FFMPEG_OPTIMIZE_ARGS,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+    except OSError as e:
+        logger.warning(f"Could not optimize {file_path} with ffmpeg, sending it as is: {str(e)}")
+        return None
+    if process.returncode != 0:
+        logger.warning(f"Could not optimize {file_path} with ffmpeg, sending it as is: "
+                       f"{stderr.decode(errors='replace').strip()}")
+        return None
+    return stdout
+
+def _get_api_key() -> str:
+    """Read the Deepgram API key from the environment"""
     api_key = os.environ.get("DEEPGRAM_API_KEY")
     if not api_key:
         raise ValueError("DEEPGRAM_API_KEY environment variable not set")
-        
-    # Set up default options if none provided
-    if options is None:
-        options = {
-            "model": "nova-2", 
-            "smart_format": True,
-            "diarize": True,
-            "detect_language": True,
-            "punctuate": True,
-            "utterances": True
-        }
-        
-    # Prepare API request
-    url = "https://api.deepgram.com/v1/listen"
-    
-    # Set up headers with API key
+    return api_key
+
+# Request building and response handling shared by the async transcribers and their
+# blocking *_sync versions, which differ only in how the request is sent
+
+def _url_request(audio_url: str, options: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """Headers and JSON body for transcribing a SAS URL"""
     headers = {
-        "Authorization": f"Token {api_key}",
+        "Authorization": f"Token {_get_api_key()}",
         "Content-Type": "application/json"
     }
-    
-    # Prepare the request body with URL and options
-    payload = {
-        "url": audio_url,
-        **options
+    return headers, {"url": audio_url, **options}
+
+def _file_request(file_path: str, options: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Headers and query parameters for uploading a local file"""
+    # Determine file type from extension
+    file_type = file_path.split('.')[-1].lower()
+    headers = {
+        "Authorization": f"Token {_get_api_key()}",
+        "Content-Type": f"audio/{file_type}"
     }
+    # Query values as strings, with booleans lowercased the way Deepgram expects them
+    params = {key: str(value).lower() if isinstance(value, bool) else str(value) for key, value in options.items()}
+    return headers, params
+
+def _cached_response(cache_key: Optional[str], audio_url: str) -> Optional[Dict[str, Any]]:
+    """Return an earlier response for the same blob version and options, or None"""
+    if cache_key:
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached transcription for {audio_url[:60]}...")
+            return cached
+    return None
+
+def _failure(error_message: str) -> Dict[str, Any]:
+    """Log an error and return it as a failed result"""
+    logger.error(error_message)
+    return {
+        "success": False,
+        "error": error_message
+    }
+
+def _listen_result(status: int, body: bytes, request_id: Optional[str],
+                   cache_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Turn a listen response into the transcriber's return value
     
-    logger.info(f"Transcribing audio from URL: {audio_url[:60]}... with options: {options}")
+    Args:
+        status: HTTP status of the response
+        body: Raw response body; only its start for an error response
+        request_id: Deepgram request id from the dg-request-id header
+        cache_key: Key to cache a successful body under, if any
+        
+    Returns:
+        dict: The decoded Deepgram response, or a failed result
+    """
+    if status == 200:
+        logger.info("Transcription successful")
+        if cache_key:
+            _cache_put(cache_key, body)
+        # Parse per call so callers sharing a request never share a dict
+        return orjson.loads(body)
+    return _failure(_error_message(status, body, request_id))
+
+def _post_listen_sync(**kwargs) -> Tuple[int, bytes, Optional[str]]:
+    """
+    POST to the listen endpoint over the shared requests session
     
-    # Make the request
-    response = requests.post(url, headers=headers, json=payload)
+    The body is streamed, so an error page is only read up to ERROR_BODY_LIMIT.
     
-    # Check if the request was successful
-    if response.status_code == 200:
-        logger.info("Transcription successful")
-        return response.json()
-    else:
-        error_message = f"Deepgram API request failed: {response.status_code} - {response.text}"
-        logger.error(error_message)
-        return {
-            "success": False,
-            "error": error_message
-        }
+    Returns:
+        tuple: (HTTP status, raw response body, Deepgram request id)
+    """
+    with SESSION.post(DEEPGRAM_LISTEN_URL, timeout=REQUEST_TIMEOUT, stream=True, **kwargs) as response:
+        if response.status_code == 200:
+            body = response.content
+        else:
+            body = response.raw.read(ERROR_BODY_LIMIT, decode_content=True)
+        return response.status_code, body, response.headers.get("dg-request-id")
+
+async def transcribe_with_listen_rest(audio_url: str, options: Optional[Dict[str, Any]] = None,
+                                      session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
+    """
+    Transcribe audio using Deepgram's listen.rest API with a Blob SAS URL.
+    
+    Runs on the event loop, so many URLs can be in flight at once over the
+    shared connection pool.
+    
+    Args:
+        audio_url: The SAS URL to the audio file in Azure Blob Storage
+        options: Optional dictionary of transcription options
+        session: aiohttp session to use (default: the shared session)
+        
+    Returns:
+        dict: The complete Deepgram response
+    """
+    if options is None:
+        options = DEFAULT_OPTIONS
+    headers, payload = _url_request(audio_url, options)
+    session = session or get_aio_session()
+    
+    # Reuse an earlier response for the same blob version and options
+    etag = await _blob_etag(session, audio_url)
+    cache_key = _cache_key(audio_url, etag, options) if etag else None
+    cached = _cached_response(cache_key, audio_url)
+    if cached is not None:
+        return cached
+    
+    logger.info(f"Transcribing audio from URL: {audio_url[:60]}... with options: {options}")
+    
+    # Without an ETag, coalesce on the blob path alone
+    status, body, request_id = await _post_listen_once(session, cache_key or _cache_key(audio_url, "", options),
+                                                       headers, payload)
+    return _listen_result(status, body, request_id, cache_key)
 
-def transcribe_local_file(file_path: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+async def transcribe_local_file(file_path: str, options: Optional[Dict[str, Any]] = None,
+                                session: Optional[aiohttp.ClientSession] = None,
+                                optimize: bool = False) -> Dict[str, Any]:
     """
     Transcribe a local audio file using Deepgram's listen.rest API.
     This is useful for debugging and testing.
@@ -83,77 +321,145 @@ def transcribe_local_file(file_path: str, options: Optional[Dict[str, Any]] = No
     Args:
         file_path: Path to the local audio file
         options: Optional dictionary of transcription options
+        session: aiohttp session to use (default: the shared session)
+        optimize: Convert the file to 16 kHz mono PCM WAV with ffmpeg before uploading
         
     Returns:
         dict: The complete Deepgram response
     """
-    # Get Deepgram API key from environment
-    api_key = os.environ.get("DEEPGRAM_API_KEY")
-    if not api_key:
-        raise ValueError("DEEPGRAM_API_KEY environment variable not set")
-        
-    # Set up default options if none provided
     if options is None:
-        options = {
-            "model": "nova-2", 
-            "smart_format": True,
-            "diarize": True,
-            "detect_language": True,
-            "punctuate": True,
-            "utterances": True
-        }
+        options = DEFAULT_OPTIONS
+    headers, params = _file_request(file_path, options)
+    session = session or get_aio_session()
+    
+    logger.info(f"Transcribing local file: {file_path} with options: {options}")
+    
+    try:
+        optimized = None
+        if optimize:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(file_path)
+            optimized = await _optimize_audio_async(file_path)
+            if optimized is not None:
+                headers["Content-Type"] = "audio/wav"
         
-    # Determine file type from extension
-    file_type = file_path.split('.')[-1].lower()
+        # aiohttp streams an open file in chunks, reading it off the event loop
+        with open(file_path, 'rb') as audio_file:
+            data = optimized if optimized is not None else audio_file
+            async with session.post(DEEPGRAM_LISTEN_URL, params=params, headers=headers, data=data,
+                                    timeout=LISTEN_TIMEOUT) as response:
+                if response.status == 200:
+                    body = await response.read()
+                else:
+                    body = await response.content.read(ERROR_BODY_LIMIT)
+                return _listen_result(response.status, body, response.headers.get("dg-request-id"))
+            
+    except FileNotFoundError:
+        return _failure(f"File not found: {file_path}")
+    except Exception as e:
+        return _failure(f"Error: {str(e)}")
+
+async def transcribe_urls(urls: List[str], options: Optional[Dict[str, Any]] = None,
+                          max_concurrent: int = 8) -> List[Dict[str, Any]]:
+    """
+    Transcribe several SAS URLs concurrently.
     
-    # Configure API parameters as query string
-    params = options
+    At most max_concurrent requests are in flight at once, which keeps a large
+    batch within Deepgram's concurrency limits.
     
-    # Set up API endpoint
-    url = "https://api.deepgram.com/v1/listen"
+    Args:
+        urls: SAS URLs of the audio files
+        options: Optional dictionary of transcription options
+        max_concurrent: Maximum number of simultaneous Deepgram requests
+        
+    Returns:
+        list: One result per URL, in the same order as urls
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
     
-    # Set up headers with API key
-    headers = {
-        "Authorization": f"Token {api_key}",
-        "Content-Type": f"audio/{file_type}"
-    }
+    async def transcribe_one(url):
+        async with semaphore:
+            try:
+                return await transcribe_with_listen_rest(url, options)
+            except Exception as e:
+                logger.error(f"Error transcribing {url[:60]}...: {str(e)}")
+                return {
+                    "success": False,
+                    "error": f"Error: {str(e)}"
+                }
+    
+    return await asyncio.gather(*(transcribe_one(url) for url in urls))
+
+def transcribe_with_listen_rest_sync(audio_url: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Transcribe audio using Deepgram's listen.rest API with a Blob SAS URL.
+    Blocking version of transcribe_with_listen_rest for callers without an event loop.
+    
+    Args:
+        audio_url: The SAS URL to the audio file in Azure Blob Storage
+        options: Optional dictionary of transcription options
+        
+    Returns:
+        dict: The complete Deepgram response
+    """
+    if options is None:
+        options = DEFAULT_OPTIONS
+    headers, payload = _url_request(audio_url, options)
+    
+    # Reuse an earlier response for the same blob version and options
+    etag = _blob_etag_sync(audio_url)
+    cache_key = _cache_key(audio_url, etag, options) if etag else None
+    cached = _cached_response(cache_key, audio_url)
+    if cached is not None:
+        return cached
+    
+    logger.info(f"Transcribing audio from URL: {audio_url[:60]}... with options: {options}")
+    
+    status, body, request_id = _post_listen_sync(headers=headers, data=orjson.dumps(payload))
+    return _listen_result(status, body, request_id, cache_key)
+
+def transcribe_local_file_sync(file_path: str, options: Optional[Dict[str, Any]] = None,
+                              optimize: bool = False) -> Dict[str, Any]:
+    """
+    Transcribe a local audio file using Deepgram's listen.rest API.
+    Blocking version of transcribe_local_file for callers without an event loop.
+    
+    Args:
+        file_path: Path to the local audio file
+        options: Optional dictionary of transcription options
+        optimize: Convert the file to 16 kHz mono PCM WAV with ffmpeg before uploading
+        
+    Returns:
+        dict: The complete Deepgram response
+    """
+    if options is None:
+        options = DEFAULT_OPTIONS
+    headers, params = _file_request(file_path, options)
     
     logger.info(f"Transcribing local file: {file_path} with options: {options}")
     
     try:
-        # Read the audio file
-        with open(file_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
-        
-        # Send the request to Deepgram
-        response = requests.post(url, params=params, headers=headers, data=audio_data)
+        optimized = None
+        if optimize:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(file_path)
+            optimized = _optimize_audio(file_path)
+            if optimized is not None:
+                headers["Content-Type"] = "audio/wav"
         
-        # Check if the request was successful
-        if response.status_code == 200:
-            logger.info("Transcription successful")
-            return response.json()
-        else:
-            error_message = f"Deepgram API request failed: {response.status_code} - {response.text}"
-            logger.error(error_message)
-            return {
-                "success": False,
-                "error": error_message
-            }
+        # Stream the audio file to Deepgram in 1 MiB chunks instead of reading it into memory
+        with open(file_path, 'rb') as audio_file:
+            data = optimized if optimized is not None else iter(lambda: audio_file.read(1 << 20), b'')
+            status, body, request_id = _post_listen_sync(params=params, headers=headers, data=data)
+        return _listen_result(status, body, request_id)
             
     except FileNotFoundError:
-        error_message = f"File not found: {file_path}"
-        logger.error(error_message)
-        return {
-            "success": False,
-            "error": error_message
-        }
+        return _failure(f"File not found: {file_path}")
     except Exception as e:
-        error_message = f"Error: {str(e)}"
-        logger.error(error_message)
-        return {
-            "success": False,
-            "error": error_message
-        }
+        return _failure(f"Error: {str(e)}")
+
+# Output directories already created by save_transcription_result
+_created_dirs = set()
 
 def save_transcription_result(result: Dict[str, Any], output_path: str) -> None:
     """
@@ -163,33 +469,41 @@ def save_transcription_result(result: Dict[str, Any], output_path: str) -> None:
         result: The transcription result dictionary
         output_path: Path to save the result
     """
-    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    output_dir = os.path.dirname(output_path) or "."
+    if output_dir not in _created_dirs:
+        os.makedirs(output_dir, exist_ok=True)
+        _created_dirs.add(output_dir)
     
-    with open(output_path, 'w') as f:
-        json.dump(result, f, indent=2)
+    # Write to a temp file and rename it over the target so readers never see a partial result
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, output_path)
     
     logger.info(f"Transcription result saved to: {output_path}")
 
-def test_transcription_pipeline(audio_file_name: str) -> Dict[str, Any]:
+def test_transcription_pipeline(audio_file_name: Union[str, List[str]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
     """
-    Test the complete transcription pipeline using a file from Azure Storage.
+    Test the complete transcription pipeline using files from Azure Storage.
     
     Args:
-        audio_file_name: The name of the audio file in the Azure Storage container
+        audio_file_name: The name of the audio file in the Azure Storage container,
+            or a list of names to transcribe concurrently
         
     Returns:
-        dict: The transcription result
+        dict: The transcription result, or a list of results in the same order as the names
     """
-    from azure_storage_service import AzureStorageService
+    from azure_storage_service import get_storage_service
     
-    # Initialize Azure Storage Service
-    storage = AzureStorageService()
+    # Shared Azure Storage Service
+    storage = get_storage_service()
     
-    # Generate SAS URL for the audio file
+    # Generate SAS URLs for the audio files
     container_name = "shahulin"
-    sas_url = storage.generate_sas_url(container_name, audio_file_name)
+    names = [audio_file_name] if isinstance(audio_file_name, str) else list(audio_file_name)
+    sas_urls = [storage.generate_sas_url(container_name, name) for name in names]
     
-    if not sas_url:
+    if isinstance(audio_file_name, str) and not sas_urls[0]:
         return {
             "success": False,
             "error": f"Failed to generate SAS URL for {audio_file_name}"
@@ -205,14 +519,26 @@ def test_transcription_pipeline(audio_file_name: str) -> Dict[str, Any]:
         "utterances": True
     }
     
-    result = transcribe_with_listen_rest(sas_url, transcription_options)
+    async def transcribe_all():
+        async with aio_session_scope():
+            return await transcribe_urls([url for url in sas_urls if url], transcription_options)
+    
+    if isinstance(audio_file_name, str):
+        results = [transcribe_with_listen_rest_sync(sas_urls[0], transcription_options)]
+    else:
+        transcribed = iter(asyncio.run(transcribe_all()))
+        results = [
+            next(transcribed) if url else {"success": False, "error": f"Failed to generate SAS URL for {name}"}
+            for name, url in zip(names, sas_urls)
+        ]
     
-    # Save result to a file
+    # Save results to files
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    output_file = f"direct_test_results/transcription_{audio_file_name}_{timestamp}.json"
-    save_transcription_result(result, output_file)
+    for name, result in zip(names, results):
+        output_file = f"direct_test_results/transcription_{name}_{timestamp}.json"
+        save_transcription_result(result, output_file)
     
-    return result
+    return results[0] if isinstance(audio_file_name, str) else results
 
 def main():
     """Test function to demonstrate usage"""
@@ -1,12 +1,17 @@
-import requests
 import os
-import json
 import logging
+import orjson
 import asyncio
+import functools
+import hashlib
 import time
 from datetime import datetime
 import traceback
+from typing import NamedTuple
+from urllib.parse import urlencode
 from deepgram import Deepgram
+from http_session import LISTEN_TIMEOUT, get_aio_session
+from azure_sql_service import get_sql_service
 
 # We'll use the old SDK approach as the new SDK format isn't available in our installation
 
@@ -18,25 +23,277 @@ from dg_class_forbidden_phrases import DgClassForbiddenPhrases
 from dg_class_topic_detection import DgClassTopicDetection
 from dg_class_speaker_diarization import DgClassSpeakerDiarization
 
+class AudioFileInfo(NamedTuple):
+    """What the pipeline needs to know about a local audio file, from a single stat"""
+    path: str
+    size: int
+    ext: str
+    basename: str
+
+def _audio_file_info(path):
+    """
+    Stat an audio file once
+    
+    Args:
+        path (str): Path to the local audio file
+        
+    Returns:
+        AudioFileInfo: The path, size in bytes, lowercased extension and file name
+        
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    st = os.stat(path)
+    basename = os.path.basename(path)
+    ext = basename.rpartition('.')[2].lower() if '.' in basename else ''
+    return AudioFileInfo(path, st.st_size, ext, basename)
+
+def _peek(audio_file, size=20):
+    """Read the first bytes of an open file and rewind it. Blocking; run it in a worker thread."""
+    head = audio_file.read(size)
+    audio_file.seek(0)
+    return head
+
+def _file_sha256(path):
+    """SHA-256 hex digest of a file's content, read in chunks. Blocking; run it in a worker thread."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+def _params_hash(features):
+    """Cache key part for the transcription options; distinct from the full-response keys of other callers."""
+    key = {"source": "deepgram_service", "model": "nova-2", "features": sorted(features)}
+    return hashlib.sha1(orjson.dumps(key)).hexdigest()
+
+# Where the transcript can sit in a Deepgram response, tried in order; '*' walks every
+# item of a list. The texts found under the first path that has any are joined with spaces.
+_TRANSCRIPT_PATHS = (
+    ('transcript',),
+    ('results', 'channels', '*', 'alternatives', 0, 'transcript'),
+    ('results', 'alternatives', '*', 'transcript'),
+    ('results', 'utterances', '*', 'transcript'),
+    ('results', 'paragraphs', 'paragraphs', '*', 'text'),
+    ('channels', '*', 'alternatives', 0, 'transcript'),
+    ('alternatives', '*', 'transcript'),
+    # The summary is better than nothing if no transcript was found
+    ('results', 'summary', 'short'),
+    ('results', 'summary', 'long'),
+)
+
+# Where the detected language can sit in a Deepgram response, tried in order
+_LANGUAGE_PATHS = (
+    ('results', 'channels', 0, 'detected_language'),
+    ('results', 'metadata', 'detected_language'),
+    ('metadata', 'detected_language'),
+    ('results', 'language'),
+    ('language',),
+)
+
+def _dig(obj, path):
+    """
+    Yield the values found at a key path in nested dicts and lists
+    
+    Args:
+        obj: The parsed JSON to search
+        path (tuple): Dict keys and list indexes; '*' continues with every item of a list
+        
+    Returns:
+        generator: The values at the end of the path, none if it is missing
+    """
+    if not path:
+        yield obj
+        return
+    key, rest = path[0], path[1:]
+    if key == '*':
+        if isinstance(obj, list):
+            for item in obj:
+                yield from _dig(item, rest)
+    elif isinstance(obj, dict):
+        if key in obj:
+            yield from _dig(obj[key], rest)
+    elif isinstance(obj, list) and isinstance(key, int) and -len(obj) <= key < len(obj):
+        yield from _dig(obj[key], rest)
+
+def _slim_response(transcription_response):
+    """
+    Remove fields none of the six analyses read from a Deepgram response, in place
+    
+    Drops the per-word lists on the channel alternatives (the analyses read the
+    transcript, paragraphs and utterances), any alternatives after the first,
+    metadata warnings, and the per-word confidence/punctuated_word on
+    utterances. Utterance word lists are kept because speaker diarization
+    counts them.
+    
+    Args:
+        transcription_response (dict): {"result": ..., "error": ...} from transcribe_audio,
+            or a bare Deepgram response
+        
+    Returns:
+        dict: The same object, for chaining
+    """
+    result = transcription_response.get('result') if 'result' in transcription_response else transcription_response
+    if not isinstance(result, dict):
+        return transcription_response
+    
+    metadata = result.get('metadata')
+    if isinstance(metadata, dict):
+        metadata.pop('warnings', None)
+    
+    results = result.get('results') or {}
+    for channel in results.get('channels', []):
+        alternatives = channel.get('alternatives') or []
+        del alternatives[1:]
+        for alternative in alternatives:
+            alternative.pop('words', None)
+    for utterance in results.get('utterances', []):
+        for word in utterance.get('words', []):
+            word.pop('confidence', None)
+            word.pop('punctuated_word', None)
+    
+    return transcription_response
+
+# Optional Deepgram features requested by default. diarize and summarize are the costly ones;
+# drop them when the speaker and summary output is not needed.
+DEFAULT_FEATURES = frozenset({"smart_format", "diarize", "punctuate", "detect_language", "summarize"})
+
+# Content types for the supported audio extensions; anything else is sent as WAV
+_MIME = {
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+    'ogg': 'audio/ogg',
+    'flac': 'audio/flac',
+    'mp4': 'audio/mp4',
+    'm4a': 'audio/mp4',
+}
+
+# Statements run for every processed file. They go through sp_executesql with their values
+# as parameters: pymssql inlines values into the SQL text, which would make every call a new
+# ad-hoc batch, while with sp_executesql the text stays fixed and SQL Server reuses its plan.
+_SQL_CACHE_LOOKUP = (
+    "SELECT TOP 1 response_json FROM rdt_transcription_cache "
+    "WHERE sha256 = @sha256 AND params_hash = @params_hash"
+)
+_SQL_CACHE_LOOKUP_PARAMS = "@sha256 NVARCHAR(64), @params_hash NVARCHAR(40)"
+
+_SQL_MERGE_LANGUAGE = """
+    MERGE rdt_language AS target
+    USING (SELECT @fileid AS fileid, @language AS language, @confidence AS confidence) AS source
+    ON target.fileid = source.fileid
+    WHEN MATCHED THEN
+        UPDATE SET language = source.language,
+                   confidence = source.confidence
+    WHEN NOT MATCHED THEN
+        INSERT (fileid, language, confidence, status)
+        VALUES (source.fileid, source.language, source.confidence, 'completed');
+"""
+_SQL_MERGE_LANGUAGE_PARAMS = "@fileid NVARCHAR(255), @language NVARCHAR(100), @confidence FLOAT"
+
+# Each value is sent once; a new row gets placeholders for an empty transcript or language
+_SQL_MERGE_ASSET = """
+    MERGE rdt_assets AS target
+    USING (SELECT @fileid AS fileid, @filename AS filename, @source_path AS source_path,
+                  @file_size AS file_size, @transcription AS transcription,
+                  @transcription_json AS transcription_json, @language_detected AS language_detected,
+                  @created_dt AS created_dt) AS source
+    ON target.fileid = source.fileid
+    WHEN MATCHED THEN
+        UPDATE SET transcription = source.transcription,
+                   transcription_json = source.transcription_json,
+                   language_detected = source.language_detected,
+                   status = 'processing'
+    WHEN NOT MATCHED THEN
+        INSERT (fileid, filename, source_path, file_size, transcription, transcription_json,
+                language_detected, status, created_dt)
+        VALUES (source.fileid, source.filename, source.source_path, source.file_size,
+                COALESCE(NULLIF(source.transcription, ''), 'Transcript unavailable'),
+                source.transcription_json,
+                COALESCE(NULLIF(source.language_detected, ''), 'en'),
+                'processing', source.created_dt);
+"""
+_SQL_MERGE_ASSET_PARAMS = (
+    "@fileid NVARCHAR(255), @filename NVARCHAR(255), @source_path NVARCHAR(255), @file_size INT, "
+    "@transcription NVARCHAR(MAX), @transcription_json NVARCHAR(MAX), @language_detected NVARCHAR(100), "
+    "@created_dt DATETIME"
+)
+
+_SQL_MERGE_CACHE = """
+    MERGE rdt_transcription_cache AS target
+    USING (SELECT @sha256 AS sha256, @params_hash AS params_hash, @response_json AS response_json) AS source
+    ON target.sha256 = source.sha256 AND target.params_hash = source.params_hash
+    WHEN MATCHED THEN
+        UPDATE SET response_json = source.response_json, created_dt = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (sha256, params_hash, response_json)
+        VALUES (source.sha256, source.params_hash, source.response_json);
+"""
+_SQL_MERGE_CACHE_PARAMS = "@sha256 NVARCHAR(64), @params_hash NVARCHAR(40), @response_json NVARCHAR(MAX)"
+
+_SQL_UPDATE_COMPLETE = (
+    "UPDATE rdt_assets SET status = @status, error_message = @error_message, "
+    "processed_date = @processed_date, processing_duration = @processing_duration "
+    "WHERE fileid = @fileid"
+)
+_SQL_UPDATE_COMPLETE_PARAMS = (
+    "@status NVARCHAR(50), @error_message NVARCHAR(MAX), @processed_date DATETIME, "
+    "@processing_duration INT, @fileid NVARCHAR(255)"
+)
+
+_SQL_UPDATE_ERROR = "UPDATE rdt_assets SET status = 'error', error_message = @error_message WHERE fileid = @fileid"
+_SQL_UPDATE_ERROR_PARAMS = "@error_message NVARCHAR(MAX), @fileid NVARCHAR(255)"
+
+def _execute_sql_batch(cursor, calls):
+    """
+    Run several of the statements above through sp_executesql in one round trip
+    
+    Args:
+        cursor: Cursor to run the statements on
+        calls (list): (statement, declarations, params) tuples, where statement uses @name
+            parameters, declarations is the sp_executesql parameter list and params maps
+            each name to its value
+    """
+    fragments = []
+    args = []
+    for statement, declarations, params in calls:
+        assignments = ", ".join(f"@{name} = %s" for name in params)
+        fragments.append(f"EXEC sp_executesql %s, %s, {assignments}")
+        args.extend((statement, declarations, *params.values()))
+    cursor.execute(";\n".join(fragments), tuple(args))
+
+def _execute_sql(cursor, statement, declarations, **params):
+    """
+    Run one of the statements above through sp_executesql
+    
+    Args:
+        cursor: Cursor to run the statement on
+        statement (str): SQL text using @name parameters
+        declarations (str): The parameter declarations for sp_executesql
+        **params: The parameter values, by name
+    """
+    _execute_sql_batch(cursor, [(statement, declarations, params)])
+
 class DeepgramService:
     def __init__(self):
         """Initialize the Deepgram Service with all analysis classes"""
         self.logger = logging.getLogger(__name__)
         
-        # Deepgram API key - using the known working key directly for consistency
-        self.deepgram_api_key = "ba94baf7840441c378c58ccd1d5202c38ddc42d8"
+        # Deepgram API key, from the environment only; fail at startup rather than on the first request
+        self.deepgram_api_key = os.environ.get("DEEPGRAM_API_KEY")
+        if not self.deepgram_api_key:
+            self.logger.error("DEEPGRAM_API_KEY environment variable is not set!")
+            raise ValueError("DEEPGRAM_API_KEY environment variable is not set")
         
         # Initialize API access
         try:
             self.api_url = "https://api.deepgram.com/v1/listen"
             
-            # Initialize analysis classes
-            self.sentiment_analysis = DgClassSentimentAnalysis(self.deepgram_api_key)
-            self.language_detection = DgClassLanguageDetection(self.deepgram_api_key)
-            self.call_summarization = DgClassCallSummarization(self.deepgram_api_key)
-            self.forbidden_phrases = DgClassForbiddenPhrases(self.deepgram_api_key)
-            self.topic_detection = DgClassTopicDetection(self.deepgram_api_key)
-            self.speaker_diarization = DgClassSpeakerDiarization(self.deepgram_api_key)
+            # Request pieces that do not change between calls
+            self._auth_header = {"Authorization": f"Token {self.deepgram_api_key}"}
+            self._prebuilt_url = self.api_url + "?" + urlencode(self._query_params(DEFAULT_FEATURES))
+            
+            # Async SDK client, built once and reused by every SDK transcription
+            self.deepgram = Deepgram(self.deepgram_api_key)
+            
+            # Pooled Azure SQL connections, shared by every write this service makes
+            self.sql_service = get_sql_service()
             
             self.logger.info("Deepgram Service initialized successfully")
         except Exception as e:
@@ -44,89 +301,114 @@ class DeepgramService:
             traceback.print_exc()
             raise
     
-    async def transcribe_audio_rest_api(self, audio_file_path):
+    @functools.cached_property
+    def storage_service(self):
+        """The shared AzureStorageService, looked up when the URL-based method first needs it"""
+        from azure_storage_service import get_storage_service
+        return get_storage_service()
+    
+    # The analysis classes load NLTK data and the VADER lexicon when constructed, so they are
+    # only built once something needs them; transcription-only use never pays for it.
+    # Their fallback transcription requests share deepgram_listen_rest's pooled session.
+    # They get no sql_helper: the DG_Log* procedures they would call are not in the schema.
+    @functools.cached_property
+    def sentiment_analysis(self):
+        return DgClassSentimentAnalysis(self.deepgram_api_key)
+    
+    @functools.cached_property
+    def language_detection(self):
+        return DgClassLanguageDetection(self.deepgram_api_key)
+    
+    @functools.cached_property
+    def call_summarization(self):
+        return DgClassCallSummarization(self.deepgram_api_key)
+    
+    @functools.cached_property
+    def forbidden_phrases(self):
+        return DgClassForbiddenPhrases(self.deepgram_api_key)
+    
+    @functools.cached_property
+    def topic_detection(self):
+        return DgClassTopicDetection(self.deepgram_api_key)
+    
+    @functools.cached_property
+    def speaker_diarization(self):
+        return DgClassSpeakerDiarization(self.deepgram_api_key)
+    
+    @staticmethod
+    def _query_params(features):
+        """Query string parameters for a REST transcription with the given features."""
+        return {"model": "nova-2", **{feature: "true" for feature in sorted(features)}}
+    
+    async def transcribe_audio_rest_api(self, audio_file_path, features=DEFAULT_FEATURES, file_info=None):
         """
         Transcribe audio using Deepgram REST API (original implementation).
         
         Args:
             audio_file_path (str): Path to the local audio file to transcribe.
+            features (set): Optional Deepgram features to enable (default: DEFAULT_FEATURES).
+            file_info (AudioFileInfo): The file's stat results, if the caller already has them.
             
         Returns:
             dict: A result object with the structure {"result": response_json, "error": error_message}
         """
         try:
-            # Validate file exists
-            if not os.path.exists(audio_file_path):
+            # Validate file exists; one stat gives the size and extension too
+            try:
+                file_info = file_info or _audio_file_info(audio_file_path)
+            except FileNotFoundError:
                 self.logger.error(f"File does not exist: {audio_file_path}")
                 return {"result": None, "error": {"name": "FileNotFoundError", "message": f"File does not exist: {audio_file_path}", "status": 404}}
                 
-            # Get file size for logging
-            file_size = os.path.getsize(audio_file_path)
-            self.logger.info(f"Audio file size: {file_size} bytes")
-            
-            # Determine file type from extension
-            file_extension = os.path.splitext(audio_file_path)[1].lower().replace('.', '')
-            supported_types = ['mp3', 'wav', 'ogg', 'flac', 'mp4', 'm4a']
-            file_type = file_extension if file_extension in supported_types else 'wav'
-            
-            self.logger.info(f"File extension: {file_extension}, using mimetype: audio/{file_type}")
-            
-            # Set up the API URL with query parameters
-            params = {
-                "model": "nova-2",
-                "smart_format": "true",
-                "diarize": "true",
-                "punctuate": "true",
-                "detect_language": "true",
-                "summarize": "true"
-            }
+            self.logger.info(f"Audio file size: {file_info.size} bytes")
             
-            # Set up headers with API key
-            content_type = f"audio/{file_type}"
+            # Determine the content type from the extension
+            file_extension = file_info.ext
+            content_type = _MIME.get(file_extension, 'audio/wav')
             
-            # Special case for mp3 files - Deepgram expects audio/mpeg, not audio/mp3
-            if file_type == "mp3":
-                content_type = "audio/mpeg"
-                
-            self.logger.info(f"Using content type: {content_type}")
+            self.logger.info(f"File extension: {file_extension}, using content type: {content_type}")
             
-            headers = {
-                "Authorization": f"Token {self.deepgram_api_key}",
-                "Content-Type": content_type
-            }
+            # The default feature set uses the URL built in __init__
+            if features == DEFAULT_FEATURES:
+                url, params = self._prebuilt_url, None
+            else:
+                url, params = self.api_url, self._query_params(features)
+            
+            headers = {**self._auth_header, "Content-Type": content_type}
             
             self.logger.info(f"Sending audio file {audio_file_path} with mimetype {content_type} to Deepgram for transcription (REST API)...")
             
-            # Read the audio file and verify it contains data
-            with open(audio_file_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
+            # Verify the audio file contains data; the file itself is streamed, not read into memory
+            if file_info.size == 0:
+                self.logger.error(f"Audio file is empty: {audio_file_path}")
+                return {"result": None, "error": {"name": "EmptyFileError", "message": f"Audio file is empty: {audio_file_path}", "status": 400}}
+            
+            # Open in a worker thread; aiohttp then reads the file payload in its executor too,
+            # so no disk I/O blocks the event loop
+            with await asyncio.to_thread(open, audio_file_path, 'rb') as audio_file:
+                # Log the first few bytes for diagnostics (hex format), rewound for the upload
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("First 20 bytes of audio file: %s", (await asyncio.to_thread(_peek, audio_file)).hex())
                 
-                if len(audio_data) == 0:
-                    self.logger.error(f"Audio file is empty: {audio_file_path}")
-                    return {"result": None, "error": {"name": "EmptyFileError", "message": f"Audio file is empty: {audio_file_path}", "status": 400}}
-                
-                # Log the first few bytes for diagnostics (hex format)
-                self.logger.info(f"First 20 bytes of audio file: {audio_data[:20].hex()}")
-                
-                # Make async request with error handling
+                # Make async request with error handling, over the shared keep-alive connection pool
                 try:
-                    loop = asyncio.get_event_loop()
-                    response = await loop.run_in_executor(
-                        None,
-                        lambda: requests.post(self.api_url, params=params, headers=headers, data=audio_data)
-                    )
-                    
-                    # Check if the request was successful
-                    if response.status_code != 200:
-                        error_message = f"Deepgram API error: {response.status_code}, {response.text}"
-                        self.logger.error(error_message)
-                        return {"result": None, "error": {"name": "DeepgramApiError", "message": response.text, "status": response.status_code}}
+                    async with get_aio_session().post(url, params=params, headers=headers, data=audio_file,
+                                                      timeout=LISTEN_TIMEOUT) as response:
+                        # Check if the request was successful
+                        if response.status != 200:
+                            response_text = await response.text(errors='replace')
+                            error_message = f"Deepgram API error: {response.status}, {response_text}"
+                            self.logger.error(error_message)
+                            return {"result": None, "error": {"name": "DeepgramApiError", "message": response_text, "status": response.status}}
+                        
+                        body = await response.read()
                     
                     # Parse JSON response
-                    response_json = response.json()
+                    response_json = orjson.loads(body)
                     
-                    # Log the full response
-                    self.logger.info(f"DEEPGRAM RAW RESPONSE: {json.dumps(response_json)}")
+                    # Log the start of the raw body; skipped entirely unless DEBUG is on
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("DEEPGRAM RAW RESPONSE: %s", body[:2000].decode(errors='replace'))
                     
                     # Return a properly structured response
                     return {"result": response_json, "error": None}
@@ -141,72 +423,53 @@ class DeepgramService:
             traceback.print_exc()
             raise
             
-    async def transcribe_audio_sdk(self, audio_file_path):
+    async def transcribe_audio_sdk(self, audio_file_path, features=DEFAULT_FEATURES, file_info=None):
         """
         Transcribe audio using the official Deepgram SDK.
         
         Args:
             audio_file_path (str): Path to the local audio file to transcribe.
+            features (set): Optional Deepgram features to enable (default: DEFAULT_FEATURES).
+            file_info (AudioFileInfo): The file's stat results, if the caller already has them.
             
         Returns:
             dict: A result object with the structure {"result": response_json, "error": error_message}
         """
         try:
-            # Validate file exists
-            if not os.path.exists(audio_file_path):
+            # Validate file exists; one stat gives the size and extension too
+            try:
+                file_info = file_info or _audio_file_info(audio_file_path)
+            except FileNotFoundError:
                 self.logger.error(f"File does not exist: {audio_file_path}")
                 return {"result": None, "error": {"name": "FileNotFoundError", "message": f"File does not exist: {audio_file_path}", "status": 404}}
                 
-            # Initialize Deepgram client
-            deepgram = Deepgram(self.deepgram_api_key)
-            
-            # Get file size for logging
-            file_size = os.path.getsize(audio_file_path)
-            self.logger.info(f"Audio file size: {file_size} bytes")
+            self.logger.info(f"Audio file size: {file_info.size} bytes")
             
-            # Determine file type from extension
-            file_extension = os.path.splitext(audio_file_path)[1].lower().replace('.', '')
-            supported_types = ['mp3', 'wav', 'ogg', 'flac', 'mp4', 'm4a']
-            file_type = file_extension if file_extension in supported_types else 'wav'
+            # Determine the content type from the extension
+            file_extension = file_info.ext
+            content_type = _MIME.get(file_extension, 'audio/wav')
             
-            # Set up content type
-            content_type = f"audio/{file_type}"
-            
-            # Special case for mp3 files
-            if file_type == "mp3":
-                content_type = "audio/mpeg"
-                
             self.logger.info(f"File extension: {file_extension}, using mimetype: {content_type}")
             
             # Configure transcription options - using same options as REST API method
-            options = {
-                "model": "nova-2",
-                "smart_format": True,
-                "diarize": True,
-                "punctuate": True,
-                "detect_language": True,
-                "summarize": True
-            }
+            options = {"model": "nova-2", **{feature: True for feature in features}}
             
             self.logger.info(f"Sending audio file {audio_file_path} with mimetype {content_type} to Deepgram for transcription (SDK)...")
             
             # Read the audio file and verify it contains data
-            with open(audio_file_path, 'rb') as audio_file:
-                # For debugging, get the first few bytes
-                audio_file.seek(0)
-                first_bytes = audio_file.read(20).hex()
-                self.logger.info(f"First 20 bytes of audio file: {first_bytes}")
-                
-                # Reset file pointer to beginning
-                audio_file.seek(0)
+            with await asyncio.to_thread(open, audio_file_path, 'rb') as audio_file:
+                # For debugging, get the first few bytes (the file is rewound afterwards)
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("First 20 bytes of audio file: %s", (await asyncio.to_thread(_peek, audio_file)).hex())
                 
                 try:
                     # Send to Deepgram using SDK
                     source = {'buffer': audio_file, 'mimetype': content_type}
-                    response = await deepgram.transcription.prerecorded(source, options)
+                    response = await self.deepgram.transcription.prerecorded(source, options)
                     
-                    # Log the full response
-                    self.logger.info(f"DEEPGRAM SDK RESPONSE: {json.dumps(response)}")
+                    # Log the start of the response; serialized only when DEBUG is on
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("DEEPGRAM SDK RESPONSE: %s", orjson.dumps(response).decode()[:2000])
                     
                     # Return a properly structured response
                     return {"result": response, "error": None}
@@ -221,13 +484,14 @@ class DeepgramService:
             traceback.print_exc()
             raise
 
-    def transcribe_with_listen_rest(self, audio_file_path):
+    async def transcribe_with_listen_rest(self, audio_file_path, features=DEFAULT_FEATURES):
         """
         Transcribe audio using Deepgram's REST API with a direct URL approach.
         This method uses the standard REST API but with a SAS URL input.
         
         Args:
             audio_file_path (str): Path to the local audio file to transcribe.
+            features (set): Optional Deepgram features to enable, plus utterances (default: DEFAULT_FEATURES).
             
         Returns:
             dict: A result object with the structure {"result": response_json, "error": error_message}
@@ -235,52 +499,44 @@ class DeepgramService:
         try:
             self.logger.info(f"Using listen.rest-like API for transcription: {audio_file_path}")
             
-            # For testing with local files, we need to create a SAS URL from Azure Storage
-            from azure_storage_service import AzureStorageService
-            storage = AzureStorageService()
-            
             # Get the blob name from the file path
             blob_name = os.path.basename(audio_file_path)
             self.logger.info(f"Generating SAS URL for blob: {blob_name}")
             
-            # Generate a SAS URL for the file
-            audio_url = storage.generate_sas_url("shahulin", blob_name)
+            # Generate a SAS URL for the file; the signed token is cached per blob for SAS_CACHE_SECONDS,
+            # so retries and reprocessing of the same blob do not sign again
+            audio_url = self.storage_service.generate_sas_url("shahulin", blob_name)
             self.logger.info(f"SAS URL generated: {audio_url[:60]}...")
             
             # Set up the Deepgram API endpoint
             url = "https://api.deepgram.com/v1/listen"
             
             # Set up headers with API key
-            headers = {
-                "Authorization": f"Token {self.deepgram_api_key}",
-                "Content-Type": "application/json"
-            }
+            headers = {**self._auth_header, "Content-Type": "application/json"}
             
             # Prepare the request body with URL and options
             payload = {
                 "url": audio_url,
                 "model": "nova-2",  # Using a recent model
-                "smart_format": True,
-                "diarize": True,
-                "detect_language": True,
-                "punctuate": True,
                 "utterances": True,
-                "summarize": True
+                **{feature: True for feature in features}
             }
             
-            # Send the request
+            # Send the request over the shared keep-alive connection pool
             self.logger.info("Sending request to Deepgram API with URL input...")
-            response = requests.post(url, headers=headers, json=payload)
+            async with get_aio_session().post(url, headers=headers, data=orjson.dumps(payload),
+                                              timeout=LISTEN_TIMEOUT) as response:
+                body = await response.read()
             
             # Check if the request was successful
-            if response.status_code == 200:
-                result = response.json()
+            if response.status == 200:
+                result = orjson.loads(body)
                 self.logger.info("URL-based transcription completed successfully")
                 return {"result": result, "error": None}
             else:
-                error_message = f"Deepgram API request failed: {response.status_code} - {response.text}"
+                error_message = f"Deepgram API request failed: {response.status} - {body.decode(errors='replace')}"
                 self.logger.error(error_message)
-                return {"result": None, "error": {"name": "ListenRestError", "message": error_message, "status": response.status_code}}
+                return {"result": None, "error": {"name": "ListenRestError", "message": error_message, "status": response.status}}
             
         except Exception as e:
             error_message = f"Error in listen.rest transcription: {str(e)}"
@@ -289,7 +545,7 @@ class DeepgramService:
             self.logger.error(traceback.format_exc())
             return {"result": None, "error": {"name": "ListenRestError", "message": error_message, "status": 500}}
 
-    async def transcribe_audio(self, audio_file_path):
+    async def transcribe_audio(self, audio_file_path, features=None, file_info=None):
         """
         Main transcription method that can use various Deepgram integration approaches.
         Currently supports:
@@ -301,6 +557,9 @@ class DeepgramService:
         
         Args:
             audio_file_path (str): Path to the local audio file to transcribe.
+            features (set): Optional Deepgram features to enable for the listen.rest, SDK and REST
+                methods (default: DEFAULT_FEATURES). Fewer features transcribe faster.
+            file_info (AudioFileInfo): The file's stat results, if the caller already has them.
             
         Returns:
             dict: A result object with the structure {"result": response_json, "error": error_message}
@@ -308,6 +567,8 @@ class DeepgramService:
         # Import required modules
         import os
         
+        features = DEFAULT_FEATURES if features is None else frozenset(features)
+        
         # Get environment variable that determines which method to use
         # Defaults to 'rest_api' if not specified
         transcription_method = os.environ.get("DEEPGRAM_TRANSCRIPTION_METHOD", "rest_api").lower()
@@ -315,12 +576,12 @@ class DeepgramService:
         # URL-based REST API method (highest priority)
         if transcription_method == "listen.rest" or transcription_method == "url":
             self.logger.info("Using URL-based REST API method for transcription")
-            result = self.transcribe_with_listen_rest(audio_file_path)
+            result = await self.transcribe_with_listen_rest(audio_file_path, features)
             
             # If the method fails, fall back to SDK
             if result["error"] is not None:
                 self.logger.warning("URL-based REST API method failed, falling back to SDK")
-                return await self.transcribe_audio_sdk(audio_file_path)
+                return await self.transcribe_audio_sdk(audio_file_path, features, file_info)
             return result
         
         # Shortcut method as fourth option
@@ -336,7 +597,7 @@ class DeepgramService:
                 # If it returns a standard result with 'error' key, handle accordingly
                 if isinstance(result, dict) and 'error' in result and result['error']:
                     self.logger.warning(f"SHORTCUT method failed: {result['error']}, falling back to SDK")
-                    return await self.transcribe_audio_sdk(audio_file_path)
+                    return await self.transcribe_audio_sdk(audio_file_path, features, file_info)
                 
                 # Wrap the result in our standard format if needed
                 if isinstance(result, dict) and 'error' not in result:
@@ -347,16 +608,16 @@ class DeepgramService:
             except Exception as e:
                 self.logger.error(f"Exception in SHORTCUT method: {str(e)}")
                 self.logger.warning("SHORTCUT method failed with exception, falling back to SDK")
-                return await self.transcribe_audio_sdk(audio_file_path)
+                return await self.transcribe_audio_sdk(audio_file_path, features, file_info)
                 
         elif transcription_method == "sdk":
             self.logger.info("Using SDK method for transcription")
-            result = await self.transcribe_audio_sdk(audio_file_path)
+            result = await self.transcribe_audio_sdk(audio_file_path, features, file_info)
             
             # If SDK method fails, fall back to REST API
             if result["error"] is not None:
                 self.logger.warning("SDK method failed, falling back to REST API")
-                return await self.transcribe_audio_rest_api(audio_file_path)
+                return await self.transcribe_audio_rest_api(audio_file_path, features, file_info)
             return result
         elif transcription_method == "direct":
             self.logger.info("Using DIRECT method for transcription")
@@ -385,286 +646,262 @@ class DeepgramService:
             except Exception as e:
                 self.logger.error(f"Exception in DIRECT method: {str(e)}")
                 self.logger.warning("Falling back to REST API after DIRECT and SHORTCUT failures")
-                return await self.transcribe_audio_rest_api(audio_file_path)
+                return await self.transcribe_audio_rest_api(audio_file_path, features, file_info)
         else:
             # Default to REST API method
             self.logger.info("Using REST API method for transcription")
-            result = await self.transcribe_audio_rest_api(audio_file_path)
+            result = await self.transcribe_audio_rest_api(audio_file_path, features, file_info)
             
             # If REST API method fails, fall back to SDK
             if result["error"] is not None:
                 self.logger.warning("REST API method failed, falling back to SDK")
-                return await self.transcribe_audio_sdk(audio_file_path)
+                return await self.transcribe_audio_sdk(audio_file_path, features, file_info)
             return result
     
-    async def process_audio_file(self, audio_file_path, fileid=None):
-        """Process an audio file with all analysis types"""
-        try:
-            start_time = time.time()
+    def _get_cached_transcription(self, content_sha, params_hash):
+        """
+        Look up a stored transcription of the same audio with the same options. Blocking; run it in a worker thread.
+        
+        Args:
+            content_sha (str): SHA-256 of the audio file content
+            params_hash (str): Hash of the transcription options
             
-            # Generate a file ID if not provided
-            if not fileid:
-                fileid = f"file_{int(time.time())}_{os.path.basename(audio_file_path).split('.')[0]}"
+        Returns:
+            str: The stored response JSON, or None if there is none or the lookup failed
+        """
+        try:
+            with self.sql_service.get_conn() as conn:
+                cursor = conn.cursor()
+                _execute_sql(cursor, _SQL_CACHE_LOOKUP, _SQL_CACHE_LOOKUP_PARAMS,
+                             sha256=content_sha, params_hash=params_hash)
+                row = cursor.fetchone()
+                cursor.close()
+            return row['response_json'] if row else None
+        except Exception as e:
+            self.logger.warning(f"Transcription cache lookup failed: {str(e)}")
+            return None
+    
+    def _store_transcription(self, fileid, file_info, transcription_response, transcript_text, transcription_json_str,
+                             cache_key=None):
+        """
+        Upsert the transcription into rdt_language and rdt_assets. Blocking; run it in a worker thread.
+        
+        Args:
+            fileid (str): The file ID of the asset
+            file_info (AudioFileInfo): The transcribed audio file
+            transcription_response (dict): The Deepgram response
+            transcript_text (str): The transcript extracted from the response
+            transcription_json_str (str): The response JSON to store with the asset, or None
+                to serialize transcription_response here
+            cache_key (tuple): (content SHA-256, params hash) to also save the response
+                to rdt_transcription_cache under, or None to skip the cache
+        """
+        with self.sql_service.get_conn() as conn:
+            cursor = conn.cursor()
             
-            self.logger.info(f"Processing audio file: {audio_file_path} with ID: {fileid}")
+            # Parse the nested JSON response
+            if isinstance(transcription_response, dict) and 'result' in transcription_response:
+                result_json = transcription_response['result']
+            else:
+                result_json = transcription_response
             
-            # Perform transcription
-            transcription_response = await self.transcribe_audio(audio_file_path)
-            transcription_json_str = json.dumps(transcription_response)
+            # Extract the detected language from the first path that has one
+            detected_language = 'unknown'  # Default fallback to unknown
+            language_path = 'default'
+            for path in _LANGUAGE_PATHS:
+                language = next(_dig(result_json, path), None)
+                if language:
+                    detected_language = language
+                    language_path = ".".join(map(str, path))
+                    break
+            language_confidence = next(_dig(result_json, ('results', 'channels', 0, 'language_confidence')), 0.0)
             
-            # Extract the transcript text using a robust approach
-            transcript_text = ""
-            extraction_path = "None"
+            self.logger.info(f"Extracted language: {detected_language} via path: {language_path}")
             
-            # Log the structure of the response to help debug
-            self.logger.info(f"RESPONSE KEYS: {transcription_response.keys()}")
+            if not transcript_text:
+                self.logger.warning("No transcript text extracted; a new asset row gets a placeholder")
+            
+            # Serialized here rather than up front, so the text exists only for the writes below
+            if transcription_json_str is None:
+                transcription_json_str = orjson.dumps(transcription_response).decode()
+            
+            # Upsert the rdt_language and rdt_assets rows (and the cache entry) in one batch and one
+            # transaction; the asset's file details are used only when its row is new
+            writes = [
+                (_SQL_MERGE_LANGUAGE, _SQL_MERGE_LANGUAGE_PARAMS, {
+                    "fileid": fileid,
+                    "language": detected_language,
+                    "confidence": language_confidence,
+                }),
+                (_SQL_MERGE_ASSET, _SQL_MERGE_ASSET_PARAMS, {
+                    "fileid": fileid,
+                    "filename": file_info.basename,
+                    "source_path": file_info.path,
+                    "file_size": file_info.size,
+                    "transcription": transcript_text,
+                    "transcription_json": transcription_json_str,
+                    "language_detected": detected_language,
+                    "created_dt": datetime.now(),
+                }),
+            ]
             
-            # Method 0: Check for direct transcript field in shortcut method response
-            if 'transcript' in transcription_response:
-                transcript_text = transcription_response['transcript']
-                extraction_path = "transcript (root level)"
-                self.logger.info(f"Found transcript at root level: {transcript_text[:50]}...")
-            # Method 0.1: Check if there's a result key containing transcript (from shortcut method)
-            elif 'result' in transcription_response and isinstance(transcription_response['result'], dict) and 'transcript' in transcription_response['result']:
-                transcript_text = transcription_response['result']['transcript']
-                extraction_path = "result.transcript"
-                self.logger.info(f"Found transcript in result.transcript: {transcript_text[:50]}...")
-            
-            # Method 1: Standard path in Deepgram schema (results.channels[].alternatives[].transcript)
-            elif 'results' in transcription_response and 'channels' in transcription_response['results']:
-                self.logger.info("Found 'results.channels' path")
-                for channel in transcription_response['results']['channels']:
-                    if 'alternatives' in channel and len(channel['alternatives']) > 0:
-                        if 'transcript' in channel['alternatives'][0]:
-                            transcript_text += channel['alternatives'][0]['transcript']
-                            extraction_path = "results.channels[].alternatives[].transcript"
-            
-            # Method 2: Alternative path in some Deepgram responses (results.alternatives[].transcript)
-            if not transcript_text and 'results' in transcription_response and 'alternatives' in transcription_response['results']:
-                self.logger.info("Found 'results.alternatives' path")
-                for alt in transcription_response['results']['alternatives']:
-                    if 'transcript' in alt:
-                        transcript_text += alt['transcript']
-                        extraction_path = "results.alternatives[].transcript"
-            
-            # Method 3: Alternative path in some Deepgram responses (results.utterances[].transcript)
-            if not transcript_text and 'results' in transcription_response and 'utterances' in transcription_response['results']:
-                self.logger.info("Found 'results.utterances' path")
-                for utt in transcription_response['results']['utterances']:
-                    if 'transcript' in utt:
-                        transcript_text += utt['transcript'] + " "
-                        extraction_path = "results.utterances[].transcript"
-            
-            # Method 4: Alternative path in some Deepgram responses (results.paragraphs.paragraphs[].text)
-            if not transcript_text and 'results' in transcription_response and 'paragraphs' in transcription_response['results']:
-                self.logger.info("Found 'results.paragraphs' path")
-                if 'paragraphs' in transcription_response['results']['paragraphs']:
-                    for para in transcription_response['results']['paragraphs']['paragraphs']:
-                        if 'text' in para:
-                            transcript_text += para['text'] + " "
-                            extraction_path = "results.paragraphs.paragraphs[].text"
-            
-            # Method 5: Direct flattened structure (channels[].alternatives[].transcript)
-            if not transcript_text and 'channels' in transcription_response:
-                self.logger.info("Found 'channels' path")
-                for channel in transcription_response['channels']:
-                    if 'alternatives' in channel and len(channel['alternatives']) > 0:
-                        if 'transcript' in channel['alternatives'][0]:
-                            transcript_text += channel['alternatives'][0]['transcript']
-                            extraction_path = "channels[].alternatives[].transcript"
-            
-            # Method 6: Direct flattened structure (alternatives[].transcript)
-            if not transcript_text and 'alternatives' in transcription_response:
-                self.logger.info("Found 'alternatives' path")
-                for alt in transcription_response['alternatives']:
-                    if 'transcript' in alt:
-                        transcript_text += alt['transcript']
-                        extraction_path = "alternatives[].transcript"
-            
-            # Method 7: Sometimes the summary may contain useful text if transcript fails
-            if not transcript_text and 'results' in transcription_response and 'summary' in transcription_response['results']:
-                self.logger.info("Found 'results.summary' path")
-                if 'short' in transcription_response['results']['summary']:
-                    transcript_text = transcription_response['results']['summary']['short']
-                    extraction_path = "results.summary.short"
-                elif 'long' in transcription_response['results']['summary']:
-                    transcript_text = transcription_response['results']['summary']['long']
-                    extraction_path = "results.summary.long"
+            # Keep the response for the next run over the same audio
+            if cache_key:
+                content_sha, params_hash = cache_key
+                writes.append((_SQL_MERGE_CACHE, _SQL_MERGE_CACHE_PARAMS, {
+                    "sha256": content_sha,
+                    "params_hash": params_hash,
+                    "response_json": transcription_json_str,
+                }))
             
-            self.logger.info(f"Extraction path used: {extraction_path}")
-            self.logger.info(f"Extracted transcript ({len(transcript_text)} chars): {transcript_text[:100]}...")
+            _execute_sql_batch(cursor, writes)
             
-            # Save transcription to database
-            from azure_sql_service import AzureSQLService
-            sql_service = AzureSQLService()
-            conn = sql_service._get_connection()
+            conn.commit()
+            cursor.close()
+    
+    def _mark_completed(self, fileid, processing_time, error_message=None):
+        """
+        Set the asset status to completed. Blocking; run it in a worker thread.
+        
+        Args:
+            fileid (str): The file ID of the asset
+            processing_time (int): Processing duration in milliseconds
+            error_message (str): The failed analyses, if any; the status becomes completed_with_errors
+        """
+        with self.sql_service.get_conn() as conn:
+            cursor = conn.cursor()
+            _execute_sql(cursor, _SQL_UPDATE_COMPLETE, _SQL_UPDATE_COMPLETE_PARAMS,
+                         status='completed_with_errors' if error_message else 'completed',
+                         error_message=error_message,
+                         processed_date=datetime.now(),
+                         processing_duration=processing_time,
+                         fileid=fileid)
+            conn.commit()
+            cursor.close()
+    
+    def _mark_error(self, fileid, error_message):
+        """Set the asset status to error. Blocking; run it in a worker thread."""
+        with self.sql_service.get_conn() as conn:
             cursor = conn.cursor()
+            _execute_sql(cursor, _SQL_UPDATE_ERROR, _SQL_UPDATE_ERROR_PARAMS,
+                         error_message=error_message, fileid=fileid)
+            conn.commit()
+            cursor.close()
+    
+    async def process_audio_file(self, audio_file_path, fileid=None, features=None):
+        """
+        Process an audio file with all analysis types
+        
+        Args:
+            audio_file_path (str): Path to the local audio file to process.
+            fileid (str): The file ID to store the results under (default: generated).
+            features (set): Optional Deepgram features for the transcription (default: DEFAULT_FEATURES).
+                Without diarize/summarize the speaker and summary analyses see a single speaker and no summary.
+        """
+        try:
+            start_time = time.time()
             
-            # Extract the detected language using various paths
-            detected_language = 'unknown'  # Default fallback to unknown
-            language_confidence = 0.0
-            language_path = 'default'
+            # Stat the file once; the transcription and the asset row reuse the result
+            file_info = _audio_file_info(audio_file_path)
             
-            # Parse the nested JSON response
-            if isinstance(transcription_response, dict) and 'result' in transcription_response:
-                result_json = transcription_response['result']
-            else:
-                result_json = transcription_response
-                
-            # Try various paths where the language might be found
-            if ('results' in result_json and 'channels' in result_json['results'] and 
-                result_json['results']['channels'] and len(result_json['results']['channels']) > 0):
-                channel = result_json['results']['channels'][0]
-                if 'detected_language' in channel:
-                    detected_language = channel['detected_language']
-                    language_path = 'results.channels[0].detected_language'
-                    # Check for language confidence too
-                    if 'language_confidence' in channel:
-                        language_confidence = channel['language_confidence']
-                        self.logger.info(f"Found language confidence: {language_confidence}")
-            elif ('results' in result_json and 'metadata' in result_json['results'] and 
-                'detected_language' in result_json['results']['metadata']):
-                detected_language = result_json['results']['metadata']['detected_language']
-                language_path = 'results.metadata.detected_language'
-            elif ('metadata' in result_json and 
-                  'detected_language' in result_json['metadata']):
-                detected_language = result_json['metadata']['detected_language']
-                language_path = 'metadata.detected_language'
-            elif ('results' in result_json and 
-                  'language' in result_json['results']):
-                detected_language = result_json['results']['language']
-                language_path = 'results.language'
-            elif 'language' in result_json:
-                detected_language = result_json['language']
-                language_path = 'language'
+            # Generate a file ID if not provided
+            if not fileid:
+                fileid = f"file_{int(time.time())}_{file_info.basename.split('.')[0]}"
             
-            self.logger.info(f"Extracted language: {detected_language} via path: {language_path}")
+            self.logger.info(f"Processing audio file: {audio_file_path} with ID: {fileid}")
             
-            # Also directly update rdt_language table
-            cursor.execute("SELECT * FROM rdt_language WHERE fileid = %s", (fileid,))
-            existing_language = cursor.fetchone()
-            
-            if existing_language:
-                cursor.execute("""
-                    UPDATE rdt_language
-                    SET language = %s,
-                        confidence = %s
-                    WHERE fileid = %s
-                """, (
-                    detected_language,
-                    language_confidence,
-                    fileid
-                ))
-            else:
-                cursor.execute("""
-                    INSERT INTO rdt_language
-                    (fileid, language, confidence, status)
-                    VALUES (%s, %s, %s, %s)
-                """, (
-                    fileid,
-                    detected_language,
-                    language_confidence,
-                    'completed'
-                ))
-                
-            # Check if asset already exists
-            cursor.execute("SELECT * FROM rdt_assets WHERE fileid = %s", (fileid,))
-            existing_asset = cursor.fetchone()
-            
-            if existing_asset:
-                # Update existing asset
-                cursor.execute("""
-                    UPDATE rdt_assets 
-                    SET transcription = %s, 
-                        transcription_json = %s, 
-                        language_detected = %s,
-                        status = 'processing'
-                    WHERE fileid = %s
-                """, (
-                    transcript_text,
-                    transcription_json_str,
-                    detected_language,
-                    fileid
-                ))
+            # Reuse the stored transcription when the same audio was transcribed with the same options
+            content_sha = await asyncio.to_thread(_file_sha256, audio_file_path)
+            params_hash = _params_hash(DEFAULT_FEATURES if features is None else features)
+            transcription_json_str = await asyncio.to_thread(self._get_cached_transcription, content_sha, params_hash)
+            
+            if transcription_json_str:
+                self.logger.info(f"Using cached transcription for {audio_file_path} (sha256 {content_sha[:12]})")
+                transcription_response = orjson.loads(transcription_json_str)
+                cache_key = None
             else:
-                # Ensure all values are present and valid before inserting
-                filename = os.path.basename(audio_file_path)
-                source_path = audio_file_path
-                
-                # Get file size or use default if not accessible
-                try:
-                    file_size = os.path.getsize(audio_file_path) if os.path.exists(audio_file_path) else 1024
-                except:
-                    self.logger.warning(f"Could not get file size for {audio_file_path}, using default")
-                    file_size = 1024  # Default to 1KB if file size can't be determined
+                # Perform transcription
+                transcription_response = await self.transcribe_audio(audio_file_path, features, file_info)
                 
-                # Ensure transcript text is not null
-                if not transcript_text:
-                    transcript_text = "Transcript unavailable"
-                    self.logger.warning("No transcript text extracted, using placeholder")
+                # Store and analyse only the fields the analyses use; the word-level detail is most of the payload.
+                # The analyses share the parsed dict; the JSON text is only built by _store_transcription,
+                # once, right before the write that needs it.
+                _slim_response(transcription_response)
+                transcription_json_str = None
                 
-                # Ensure language is not null
-                if not detected_language:
-                    detected_language = "en"  # Default to English
-                    self.logger.warning("No language detected, using default (en)")
-                
-                # Create new asset with validated data
-                cursor.execute("""
-                    INSERT INTO rdt_assets 
-                    (fileid, filename, source_path, file_size, transcription, transcription_json, language_detected, status,
-                     created_dt) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    fileid,
-                    filename,
-                    source_path,
-                    file_size,
-                    transcript_text,
-                    transcription_json_str,
-                    detected_language,
-                    'processing',
-                    datetime.now()  # Add current timestamp for created_dt
-                ))
+                # Only successful transcriptions are worth keeping
+                cache_key = (content_sha, params_hash) if not transcription_response.get('error') else None
             
-            conn.commit()
+            # Extract the transcript text using a robust approach
+            extraction_path = "None"
             
-            # Run all analyses in parallel
-            analyses_tasks = [
-                self.sentiment_analysis.main(transcription_json_str, fileid),
-                self.language_detection.main(transcription_json_str, fileid),
-                self.call_summarization.main(transcription_json_str, fileid),
-                self.forbidden_phrases.main(transcription_json_str, fileid, audio_file_path),
-                self.topic_detection.main(transcription_json_str, fileid, audio_file_path),
-                self.speaker_diarization.main(transcription_json_str, fileid, audio_file_path)
-            ]
+            # Log the structure of the response to help debug
+            self.logger.debug("RESPONSE KEYS: %s", transcription_response.keys())
             
-            self.logger.info(f"Running all 6 analyses for fileid: {fileid}")
-            await asyncio.gather(*analyses_tasks)
-            self.logger.info(f"All 6 analyses completed for fileid: {fileid}")
+            # Walk the plain dicts directly. The transcribers wrap Deepgram's JSON as
+            # {"result": ..., "error": ...}, so the Deepgram paths are looked up inside "result".
+            response_body = transcription_response.get('result')
+            if not isinstance(response_body, dict):
+                response_body = transcription_response
             
-            # Update asset status to completed
-            processing_time = int((time.time() - start_time) * 1000)  # Convert to milliseconds
+            # The shortcut method also puts the transcript at the root of the wrapper
+            transcript_text = transcription_response.get('transcript') or ""
+            if transcript_text:
+                extraction_path = "transcript (root level)"
+            else:
+                for path in _TRANSCRIPT_PATHS:
+                    parts = [text for text in _dig(response_body, path) if text and isinstance(text, str)]
+                    if parts:
+                        transcript_text = " ".join(parts)
+                        extraction_path = ".".join(map(str, path))
+                        break
+            
+            self.logger.info(f"Extraction path used: {extraction_path}")
+            self.logger.info(f"Extracted transcript ({len(transcript_text)} chars)")
+            self.logger.debug("Transcript starts: %.100s...", transcript_text)
+            
+            # Run all analyses in parallel. They work from the in-memory response, so saving the
+            # transcription to the database runs alongside them in a worker thread. The audio path
+            # is not passed on: with it, an analysis given an empty response re-uploads the file.
+            analyses_tasks = {
+                "sentiment_analysis": self.sentiment_analysis.main(response_body, fileid),
+                "language_detection": self.language_detection.main(response_body, fileid),
+                "call_summarization": self.call_summarization.main(response_body, fileid),
+                "forbidden_phrases": self.forbidden_phrases.main(response_body, fileid),
+                "topic_detection": self.topic_detection.main(response_body, fileid),
+                "speaker_diarization": self.speaker_diarization.main(response_body, fileid)
+            }
             
-            cursor.execute("""
-                UPDATE rdt_assets 
-                SET status = 'completed', 
-                    processed_date = %s, 
-                    processing_duration = %s 
-                WHERE fileid = %s
-            """, (
-                datetime.now(),
-                processing_time,
-                fileid
+            self.logger.info(f"Running all 6 analyses for fileid: {fileid}")
+            store_task = asyncio.create_task(asyncio.to_thread(
+                self._store_transcription, fileid, file_info,
+                transcription_response, transcript_text, transcription_json_str, cache_key
             ))
+            # A failing analysis does not stop the others; its error is recorded on the asset
+            analysis_results = await asyncio.gather(*analyses_tasks.values(), return_exceptions=True)
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+            # The asset row must exist before anything else is written for it
+            await store_task
+            
+            analysis_errors = [
+                f"{name}: {str(result)}"
+                for name, result in zip(analyses_tasks, analysis_results)
+                if isinstance(result, Exception)
+            ]
+            for analysis_error in analysis_errors:
+                self.logger.error(f"Analysis failed for fileid {fileid}: {analysis_error}")
+            self.logger.info(f"All 6 analyses finished for fileid: {fileid} ({len(analysis_errors)} failed)")
+            
+            # Update asset status to completed, noting any analyses that failed
+            processing_time = int((time.time() - start_time) * 1000)  # Convert to milliseconds
+            error_message = "; ".join(analysis_errors) or None
+            await asyncio.to_thread(self._mark_completed, fileid, processing_time, error_message)
             
             return {
                 "fileid": fileid,
-                "status": "completed",
-                "processingTime": processing_time
+                "status": "completed_with_errors" if analysis_errors else "completed",
+                "processingTime": processing_time,
+                "errors": analysis_errors
             }
             
         except Exception as e:
@@ -673,31 +910,10 @@ class DeepgramService:
             
             # Update asset status to error
             try:
-                from azure_sql_service import AzureSQLService
-                sql_service = AzureSQLService()
-                conn = sql_service._get_connection()
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE rdt_assets 
-                    SET status = 'error', 
-                        error_message = %s 
-                    WHERE fileid = %s
-                """, (
-                    str(e),
-                    fileid
-                ))
-                conn.commit()
-                cursor.close()
-                conn.close()
+                await asyncio.to_thread(self._mark_error, fileid, str(e))
             except Exception as sql_e:
                 self.logger.error(f"Error updating asset status: {str(sql_e)}")
             
             raise
 
-# Import the Deepgram classes
-from dg_class_sentiment_analysis import DgClassSentimentAnalysis
-from dg_class_language_detection import DgClassLanguageDetection
-from dg_class_call_summarization import DgClassCallSummarization
-from dg_class_forbidden_phrases import DgClassForbiddenPhrases
-from dg_class_topic_detection import DgClassTopicDetection
-from dg_class_speaker_diarization import DgClassSpeakerDiarization
\ No newline at end of file
+__all__ = ["DeepgramService", "AudioFileInfo", "DEFAULT_FEATURES"]
@@ -9,6 +9,7 @@ It requires audio access to perform transcription with summarization enabled.
 
 import os
 import json
+import orjson
 import asyncio
 import re
 import nltk
@@ -103,7 +104,7 @@ class DgClassCallSummarization:
         detected_language = "Unknown"
         speaker_segments = []
         try:
-            response = json.loads(dg_response_json_str)
+            response = dg_response_json_str if isinstance(dg_response_json_str, dict) else orjson.loads(dg_response_json_str)
             if not response or "results" not in response:
                 return full_transcript, deepgram_summary_text, detected_language, speaker_segments
             
@@ -274,8 +275,12 @@ class DgClassCallSummarization:
                 return {"error": f"Invalid JSON: {str(e)}", "fileid": fileid, "status": "Error"}
         else:
             audio_source_info = audio_source_info_str
-            
-        dg_response_json_str = await self._transcribe_audio_with_summarization(audio_source_info)
+        
+        # An already-transcribed Deepgram response is used as is; only audio source info is transcribed here
+        if isinstance(audio_source_info, dict) and "results" in audio_source_info:
+            dg_response_json_str = audio_source_info
+        else:
+            dg_response_json_str = await self._transcribe_audio_with_summarization(audio_source_info)
 
         # Initialize for error logging context
         current_dg_summary = None
@@ -9,8 +9,10 @@ with additional error handling and debugging capabilities.
 import os
 import sys
 import requests
+from http_session import SESSION
 import logging
 import json
+import orjson
 import traceback
 from typing import Dict, Any, Optional
 from datetime import datetime
@@ -83,18 +85,15 @@ class DgClassCriticalTranscribeRest:
         logger.info(f"Model: {model}, Speaker Diarization: {'Enabled' if diarize else 'Disabled'}")
         
         try:
-            # Read the audio file
-            with open(file_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
-            
-            # Send the request to Deepgram
+            # Stream the audio file to Deepgram rather than reading it into memory first
             logger.info("Sending audio to Deepgram, please wait...")
-            response = requests.post(api_url, params=params, headers=headers, data=audio_data)
+            with open(file_path, 'rb') as audio_file:
+                response = SESSION.post(api_url, params=params, headers=headers, data=audio_file)
             
             # Check if the request was successful
             if response.status_code == 200:
                 logger.info("Transcription successful!")
-                response_data = response.json()
+                response_data = orjson.loads(response.content)
                 
                 # Extract basic transcript
                 basic_transcript = ""
@@ -252,7 +251,7 @@ class DgClassCriticalTranscribeRest:
             
             # Send the request to Deepgram
             logger.info(f"Sending request {request_id} to Deepgram, please wait...")
-            response = requests.post(api_url, json=payload, headers=headers, timeout=300)  # 5-minute timeout
+            response = SESSION.post(api_url, json=payload, headers=headers, timeout=300)  # 5-minute timeout
             
             # Calculate request duration
             duration = (datetime.now() - start_time).total_seconds()
@@ -265,7 +264,7 @@ class DgClassCriticalTranscribeRest:
                     'request_id': request_id,
                     'duration': duration,
                     'blob_name': blob_name,
-                    'full_response': response.json()
+                    'full_response': orjson.loads(response.content)
                 }
                 
                 # Save successful response for debugging/reference
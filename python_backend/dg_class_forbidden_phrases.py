@@ -6,8 +6,9 @@ Refactored into a Python class.
 import os
 import re
 import json
+import orjson
 import asyncio
-import requests
+from http_session import SESSION
 
 # Define default forbidden phrases if none are provided
 DEFAULT_FORBIDDEN_PHRASES = {
@@ -77,16 +78,10 @@ class DgClassForbiddenPhrases:
             
             print(f"Sending audio file {audio_file_path} to Deepgram for phrase detection (Forbidden Phrases)...")
             
-            # Read the audio file
+            # Stream the audio file rather than reading it into memory first
             with open(audio_file_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
-                
                 # Make async request
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: requests.post(api_url, params=params, headers=headers, data=audio_data)
-                )
+                response = await asyncio.to_thread(SESSION.post, api_url, params=params, headers=headers, data=audio_file)
                 
                 # Check if the request was successful
                 if response.status_code != 200:
@@ -94,7 +89,7 @@ class DgClassForbiddenPhrases:
                     return None
                 
                 # Parse JSON response
-                response_json = response.json()
+                response_json = orjson.loads(response.content)
                 return response_json
         except Exception as e:
             print(f"Error during transcription for phrase detection (Forbidden Phrases) for {audio_file_path}: {e}")
@@ -217,7 +212,7 @@ class DgClassForbiddenPhrases:
         # Parse JSON string into dictionary if needed
         if dg_response_json_str_str and isinstance(dg_response_json_str_str, str):
             try:
-                dg_response_json_str = json.loads(dg_response_json_str_str)
+                dg_response_json_str = orjson.loads(dg_response_json_str_str)
             except json.JSONDecodeError as e:
                 print(f"Failed to parse dg_response_json_str_str as JSON: {str(e)}")
                 return {"error": f"Invalid JSON: {str(e)}", "fileid": fileid, "status": "Error"}
@@ -244,7 +239,8 @@ class DgClassForbiddenPhrases:
             transcription_response = None
             if dg_response_json_str:
                 print(f"Using provided transcription for Forbidden Phrases, fileid: {fileid}")
-                transcription_response = json.loads(dg_response_json_str)
+                # Already parsed by the check at the top of main()
+                transcription_response = dg_response_json_str
             elif local_audio_path:
                 print(f"Transcribing {local_audio_path} for Forbidden Phrases, fileid: {fileid}")
                 transcription_response = await self.dg_func_transcribe_audio_for_phrases(local_audio_path, all_phrases_flat_list)
@@ -9,6 +9,7 @@ other libraries like langdetect for finer-grained analysis and googletrans for t
 
 import os
 import json
+import orjson
 import asyncio
 import re
 from deepgram import Deepgram
@@ -107,14 +108,14 @@ class DgClassLanguageDetection:
         speaker_segments_text = []
         try:
             # Parse JSON string to Python dict
-            print(f"Extracting language and transcript from response (first 100 chars): {dg_response_json_str[:100]}...")
+            print(f"Extracting language and transcript from response (first 100 chars): {str(dg_response_json_str)[:100]}...")
             
             # Handle case where dg_response_json_str might already be a dict
             if isinstance(dg_response_json_str, dict):
                 response = dg_response_json_str
             else:
                 try:
-                    response = json.loads(dg_response_json_str)
+                    response = orjson.loads(dg_response_json_str)
                 except json.JSONDecodeError as e:
                     print(f"Error decoding JSON: {e}")
                     return full_transcript, detected_language_code, language_confidence, speaker_segments_text
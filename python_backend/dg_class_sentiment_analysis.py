@@ -6,6 +6,7 @@ Refactored into a Python class.
 import os
 import re
 import json
+import orjson
 import asyncio
 import nltk
 import pandas as pd
@@ -133,7 +134,7 @@ class DgClassSentimentAnalysis:
         """
         Main function to process pre-transcribed Deepgram JSON for sentiment analysis.
         Args:
-            deepgram_response_json_str (str): The pre-fetched Deepgram API JSON response as a string.
+            deepgram_response_json_str (str or dict): The pre-fetched Deepgram API JSON response, as a string or already parsed.
             fileid (str): The file ID (e.g., from deepgram_assets table, or a unique identifier like blob name).
         Returns:
             dict: A dictionary containing the sentiment analysis results.
@@ -157,9 +158,12 @@ class DgClassSentimentAnalysis:
                 self.sql_helper.execute_sp("DG_LogTimeElapsed", (self.class_name, func_name, str(fileid), start_time, end_time, (end_time - start_time).total_seconds()))
             return {"error": "No Deepgram response provided", "fileid": fileid, "status": "Error"}
 
-        # Parse JSON string into dictionary
+        # Parse JSON string into dictionary; an already-parsed response is used as is
         try:
-            deepgram_response_json = json.loads(deepgram_response_json_str)
+            if isinstance(deepgram_response_json_str, dict):
+                deepgram_response_json = deepgram_response_json_str
+            else:
+                deepgram_response_json = orjson.loads(deepgram_response_json_str)
         except json.JSONDecodeError as e:
             print(f"[{self.class_name}] Failed to parse Deepgram JSON: {str(e)}")
             if self.sql_helper:
@@ -5,8 +5,9 @@ Refactored into a Python class.
 
 import os
 import json
+import orjson
 import asyncio
-import requests
+from http_session import SESSION
 
 class DgClassSpeakerDiarization:
     def __init__(self, deepgram_api_key, sql_helper=None):
@@ -53,15 +54,8 @@ class DgClassSpeakerDiarization:
                 
                 print(f"Sending audio file {audio_file_path} to Deepgram for diarization...")
                 
-                # Read the audio file
-                audio_data = audio.read()
-                
-                # Make async request
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: requests.post(api_url, params=params, headers=headers, data=audio_data)
-                )
+                # Make async request, streaming the audio file rather than reading it into memory first
+                response = await asyncio.to_thread(SESSION.post, api_url, params=params, headers=headers, data=audio)
                 
                 # Check if the request was successful
                 if response.status_code != 200:
@@ -69,7 +63,7 @@ class DgClassSpeakerDiarization:
                     return None
                 
                 # Parse JSON response
-                response_json = response.json()
+                response_json = orjson.loads(response.content)
                 return response_json
         except Exception as e:
             print(f"Error during transcription with diarization: {e}")
@@ -218,7 +212,7 @@ class DgClassSpeakerDiarization:
         # Parse JSON string into dictionary if needed
         if dg_response_json_str_str and isinstance(dg_response_json_str_str, str):
             try:
-                dg_response_json_str = json.loads(dg_response_json_str_str)
+                dg_response_json_str = orjson.loads(dg_response_json_str_str)
             except json.JSONDecodeError as e:
                 print(f"Failed to parse dg_response_json_str_str as JSON: {str(e)}")
                 return {"error": f"Invalid JSON: {str(e)}", "fileid": fileid, "status": "Error"}
@@ -242,7 +236,8 @@ class DgClassSpeakerDiarization:
                 else:
                     raise ValueError("No Deepgram response or audio file path provided.")
             else:
-                transcription_response_dict = json.loads(dg_response_json_str)
+                # Already parsed by the check at the top of main()
+                transcription_response_dict = dg_response_json_str
 
             if not transcription_response_dict:
                 error_message = "Transcription with diarization failed or produced no response."
@@ -9,9 +9,10 @@ Deepgram's own summarization (if enabled and returned) is also captured.
 
 import os
 import json
+import orjson
 import asyncio
 import re
-import requests
+from http_session import SESSION
 
 # Attempt to import NLTK and scikit-learn, provide guidance if missing
 try:
@@ -101,15 +102,8 @@ class DgClassTopicDetection:
                 
                 print(f"Sending audio file {audio_file_path} to Deepgram for transcription (Topic Detection)...")
                 
-                # Read the audio file
-                audio_data = audio.read()
-                
-                # Make async request
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: requests.post(api_url, params=params, headers=headers, data=audio_data)
-                )
+                # Make async request, streaming the audio file rather than reading it into memory first
+                response = await asyncio.to_thread(SESSION.post, api_url, params=params, headers=headers, data=audio)
                 
                 # Check if the request was successful
                 if response.status_code != 200:
@@ -117,7 +111,7 @@ class DgClassTopicDetection:
                     return None
                 
                 # Parse JSON response
-                response_json = response.json()
+                response_json = orjson.loads(response.content)
                 return response_json
         except Exception as e:
             print(f"Error during transcription (Topic Detection) for {audio_file_path}: {e}")
@@ -260,7 +254,7 @@ class DgClassTopicDetection:
         # Parse JSON string into dictionary if needed
         if dg_response_json_str_str and isinstance(dg_response_json_str_str, str):
             try:
-                dg_response_json_str = json.loads(dg_response_json_str_str)
+                dg_response_json_str = orjson.loads(dg_response_json_str_str)
             except json.JSONDecodeError as e:
                 print(f"Failed to parse dg_response_json_str_str as JSON: {str(e)}")
                 return {"error": f"Invalid JSON: {str(e)}", "fileid": fileid, "status": "Error"}
@@ -287,7 +281,8 @@ class DgClassTopicDetection:
             transcription_response = None
             if dg_response_json_str:
                 print(f"Using provided transcription for Topic Detection, fileid: {fileid}")
-                transcription_response = json.loads(dg_response_json_str)
+                # Already parsed by the check at the top of main()
+                transcription_response = dg_response_json_str
             elif local_audio_path:
                 print(f"Transcribing {local_audio_path} for Topic Detection, fileid: {fileid}")
                 transcription_response = await self.dg_func_transcribe_audio(local_audio_path, enable_dg_summarize)
@@ -7,9 +7,10 @@ without downloading them first, as per user requirements.
 """
 
 import os
-import json
+import gzip
+import orjson
 import logging
-import requests
+from http_session import SESSION
 import uuid
 from datetime import datetime
 
@@ -20,6 +21,9 @@ logger = logging.getLogger(__name__)
 # Environment variables
 DEEPGRAM_API_KEY = os.environ.get('DEEPGRAM_API_KEY', 'ba94baf7840441c378c58ccd1d5202c38ddc42d8')
 
+# Set DEEPGRAM_DEBUG to save every Deepgram response to a gzipped deepgram_response_<id>.json.gz file
+DEEPGRAM_DEBUG = bool(os.environ.get('DEEPGRAM_DEBUG'))
+
 def transcribe_from_sas_url(blob_sas_url, api_key=DEEPGRAM_API_KEY, model="nova-2", diarize=True):
     """
     Transcribe audio directly from Azure Blob Storage SAS URL without downloading
@@ -63,13 +67,13 @@ def transcribe_from_sas_url(blob_sas_url, api_key=DEEPGRAM_API_KEY, model="nova-
         }
         
         # Send the request with the SAS URL
-        response = requests.post(url, params=params, headers=headers, json=payload)
+        response = SESSION.post(url, params=params, headers=headers, json=payload)
         
         # Check if the request was successful
         response.raise_for_status()
         
         # Parse the response
-        result = response.json()
+        result = orjson.loads(response.content)
         
         # Check if we have valid results
         if 'results' not in result:
@@ -89,29 +93,27 @@ def transcribe_from_sas_url(blob_sas_url, api_key=DEEPGRAM_API_KEY, model="nova-
         # Extract speaker transcript if diarization is enabled
         speaker_transcript = ""
         if diarize and 'results' in result and 'utterances' in result['results']:
-            utterances = result['results']['utterances']
-            speaker_segments = []
-            
-            for utterance in utterances:
-                speaker = utterance.get('speaker', 'unknown')
-                text = utterance.get('transcript', '')
-                speaker_segments.append(f"Speaker {speaker}: {text}")
-            
-            speaker_transcript = "\n".join(speaker_segments)
-        
-        # Save the response to a file for debugging and reference
-        filename = f"deepgram_response_{uuid.uuid4().hex[:16]}.json"
-        with open(filename, 'w') as f:
-            json.dump(result, f, indent=2)
-        logger.info(f"Saved Deepgram response to {filename}")
+            speaker_transcript = "\n".join(
+                f"Speaker {utterance.get('speaker', 'unknown')}: {utterance.get('transcript', '')}"
+                for utterance in result['results']['utterances']
+            )
         
-        return {
+        transcription = {
             'success': True,
             'basic_transcript': basic_transcript,
             'speaker_transcript': speaker_transcript,
-            'response_data': result,
-            'response_file': filename
+            'response_data': result
         }
+        
+        # Save the response to a file for debugging and reference
+        if DEEPGRAM_DEBUG:
+            filename = f"deepgram_response_{uuid.uuid4().hex[:16]}.json.gz"
+            with gzip.open(filename, 'wb', compresslevel=1) as f:
+                f.write(orjson.dumps(result))
+            logger.info(f"Saved Deepgram response to {filename}")
+            transcription['response_file'] = filename
+        
+        return transcription
     except Exception as e:
         logger.error(f"Error transcribing audio from SAS URL: {str(e)}")
         return {
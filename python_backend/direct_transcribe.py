@@ -10,8 +10,8 @@ Key features:
 4. Verifies transcription content before returning success
 """
 
-import json
-import requests
+import orjson
+from http_session import SESSION
 import logging
 import os
 from typing import Dict, Any, Optional
@@ -75,14 +75,14 @@ class DirectTranscribe:
         
         try:
             # Send the request to Deepgram
-            response = requests.post(self.api_endpoint, headers=headers, json=payload, timeout=300)
+            response = SESSION.post(self.api_endpoint, headers=headers, json=payload, timeout=300)
             
             # Log raw response for debugging
             logger.info(f"Deepgram API Response Status: {response.status_code}")
             
             # Check if the request was successful
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 
                 # Extract transcript to verify content
                 transcript = self._extract_transcript(result)
@@ -160,7 +160,7 @@ class DirectTranscribe:
                         return alternatives[0]["transcript"]
             
             # Log structure of result for debugging
-            logger.warning(f"Could not extract transcript, result structure: {json.dumps(result, default=str)[:500]}...")
+            logger.warning(f"Could not extract transcript, result keys: {list(result.keys())}")
             return ""
         except Exception as e:
             logger.error(f"Error extracting transcript: {str(e)}")
@@ -255,8 +255,6 @@ class DirectTranscribeDB:
                 processing_result.get("file_size", 0)  # File size in bytes, use 0 if not available
             ))
             
-            # Commit the transaction
-            conn.commit()
             logger.info(f"Inserted record into rdt_assets for file {fileid}")
             
             # 2. Process audio metadata
@@ -282,9 +280,6 @@ class DirectTranscribeDB:
                         "EXEC RDS_InsertAudioMetadata @fileid=%s, @request_id=%s, @sha256=%s, @created_timestamp=%s, @audio_duration=%s, @confidence=%s",
                         (fileid, request_id, sha256, created, duration, confidence)
                     )
-                    
-                    # Commit after audio metadata
-                    conn.commit()
                     logger.info(f"Inserted audio metadata for file {fileid}")
                     
                 except Exception as e:
@@ -363,46 +358,49 @@ class DirectTranscribeDB:
                             }]
                         })
                     
-                    # Process and store all paragraphs and sentences
-                    for para_idx, paragraph in enumerate(paragraphs):
-                        para_text = paragraph.get('text', '')
-                        para_start = paragraph.get('start', 0)
-                        para_end = paragraph.get('end', 0)
-                        para_speaker = paragraph.get('speaker', 'unknown')
-                        para_num_words = paragraph.get('num_words', 0)
-                        
-                        # Execute the stored procedure and get the new paragraph ID
+                    # Store all paragraphs in one call, then all of their sentences in another
+                    para_rows = [
+                        {
+                            'paragraph_idx': para_idx,
+                            'text': paragraph.get('text', ''),
+                            'start_time': paragraph.get('start', 0),
+                            'end_time': paragraph.get('end', 0),
+                            'speaker': str(paragraph.get('speaker', 'unknown')),
+                            'num_words': paragraph.get('num_words', 0)
+                        }
+                        for para_idx, paragraph in enumerate(paragraphs)
+                    ]
+                    
+                    if para_rows:
                         cursor.execute(
-                            "DECLARE @new_para_id INT; EXEC RDS_InsertParagraph @fileid=%s, @paragraph_idx=%s, @text=%s, @start_time=%s, @end_time=%s, @speaker=%s, @num_words=%s, @paragraph_id=@new_para_id OUTPUT; SELECT @new_para_id;",
-                            (fileid, para_idx, para_text, para_start, para_end, para_speaker, para_num_words)
+                            "EXEC RDS_InsertParagraphsBatch @fileid=%s, @rows=%s",
+                            (fileid, json.dumps(para_rows))
                         )
                         
-                        # Get the paragraph ID
-                        result = cursor.fetchone()
-                        paragraph_id = result[0] if result else None
-                        
-                        # Commit after each paragraph
-                        conn.commit()
-                        
-                        if not paragraph_id:
-                            logger.warning(f"Failed to get paragraph ID for paragraph {para_idx} in file {fileid}")
-                            continue
+                        # Map paragraph_idx -> new paragraph ID
+                        paragraph_ids = dict(cursor.fetchall())
                         
-                        # Insert sentences for this paragraph
-                        for sent in paragraph.get('sentences', []):
-                            sent_idx = sent.get('id', f"{para_idx}_0")
-                            sent_text = sent.get('text', '')
-                            sent_start = sent.get('start', 0)
-                            sent_end = sent.get('end', 0)
+                        sent_rows = []
+                        for para_idx, paragraph in enumerate(paragraphs):
+                            paragraph_id = paragraph_ids.get(para_idx)
+                            if not paragraph_id:
+                                logger.warning(f"Failed to get paragraph ID for paragraph {para_idx} in file {fileid}")
+                                continue
                             
-                            # Execute the stored procedure
+                            for sent in paragraph.get('sentences', []):
+                                sent_rows.append({
+                                    'paragraph_id': paragraph_id,
+                                    'sentence_idx': sent.get('id', f"{para_idx}_0"),
+                                    'text': sent.get('text', ''),
+                                    'start_time': sent.get('start', 0),
+                                    'end_time': sent.get('end', 0)
+                                })
+                        
+                        if sent_rows:
                             cursor.execute(
-                                "EXEC RDS_InsertSentence @fileid=%s, @paragraph_id=%s, @sentence_idx=%s, @text=%s, @start_time=%s, @end_time=%s",
-                                (fileid, paragraph_id, sent_idx, sent_text, sent_start, sent_end)
+                                "EXEC RDS_InsertSentencesBatch @fileid=%s, @rows=%s",
+                                (fileid, json.dumps(sent_rows))
                             )
-                            
-                            # Commit after each sentence
-                            conn.commit()
                     
                     logger.info(f"Stored {len(paragraphs)} paragraphs for file {fileid}")
                     
@@ -411,6 +409,9 @@ class DirectTranscribeDB:
                     import traceback
                     logger.error(traceback.format_exc())
             
+            # Commit the asset, metadata, paragraphs and sentences as one transaction
+            conn.commit()
+            
             # Close the connection
             cursor.close()
             conn.close()
@@ -13,6 +13,7 @@ This script:
 import os
 import sys
 import json
+import orjson
 import logging
 import uuid
 import traceback
@@ -326,8 +327,8 @@ if __name__ == "__main__":
     
     # Save results to a file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    with open(f"integration_test_results_{timestamp}.json", "w") as f:
-        json.dump(test_results, f, indent=2)
+    with open(f"integration_test_results_{timestamp}.json", "wb") as f:
+        f.write(orjson.dumps(test_results, option=orjson.OPT_INDENT_2))
     
     # Print summary
     print("\n=== Integration Test Summary ===")
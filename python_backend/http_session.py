@@ -0,0 +1,82 @@
+"""
+Shared HTTP sessions for calls to Deepgram and Azure
+
+Importing this module only builds the requests session: it does not configure
+logging or pull in any of the transcription scripts, so services can share the
+connection pools without inheriting a script's setup.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session so connections to api.deepgram.com are kept alive and reused between calls
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+# Per-request timeout for async listen calls. There is no overall cap, since uploading and
+# transcribing a long recording can take well past the session's 300 s total; a connection
+# that stalls is still caught by the connect and read limits.
+LISTEN_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=300)
+
+# Shared aiohttp session for the async transcribers, created in the running event loop on first use
+_aio_session = None
+_aio_loop = None
+
+def get_aio_session() -> aiohttp.ClientSession:
+    """
+    Return the shared aiohttp session, creating it in the running event loop on first use
+    
+    The session belongs to the loop that created it, and whoever runs that loop
+    must close it with close_aio_session() (or aio_session_scope()) before the
+    loop shuts down. Reaching for it from another loop while it is still open
+    is an error rather than a silent leak of its connector.
+    
+    Returns:
+        aiohttp.ClientSession: Session with a pooled connector, reused across calls
+        
+    Raises:
+        RuntimeError: If the session is still open from a different event loop
+    """
+    global _aio_session, _aio_loop
+    loop = asyncio.get_running_loop()
+    if _aio_session is not None and not _aio_session.closed:
+        if _aio_loop is not loop:
+            raise RuntimeError("The shared aiohttp session is still open from another event loop; "
+                               "close it with close_aio_session() before that loop shuts down")
+        return _aio_session
+    _aio_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=300)
+    )
+    _aio_loop = loop
+    return _aio_session
+
+async def close_aio_session() -> None:
+    """Close the shared aiohttp session; call before the event loop shuts down"""
+    global _aio_session, _aio_loop
+    if _aio_session is not None and not _aio_session.closed:
+        await _aio_session.close()
+    _aio_session = None
+    _aio_loop = None
+
+@asynccontextmanager
+async def aio_session_scope() -> AsyncIterator[aiohttp.ClientSession]:
+    """
+    Keep the shared aiohttp session open for one top-level run, then close it
+    
+    Wrap the body of each asyncio.run() entry point that uses the async
+    transcribers, so every run closes the session its loop created.
+    """
+    try:
+        yield get_aio_session()
+    finally:
+        await close_aio_session()
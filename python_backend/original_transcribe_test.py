@@ -158,13 +158,11 @@ def transcribe_audio_file(file_path, api_key, model="nova-2", diarize=True):
     print(f"Model: {model}, Speaker Diarization: {'Enabled' if diarize else 'Disabled'}")
     
     try:
-        # Read the audio file
-        with open(file_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
-        
-        # Send the request to Deepgram
+        # Stream the audio file to Deepgram in 1 MiB chunks instead of reading it into memory
         print("Sending audio to Deepgram, please wait...")
-        response = requests.post(api_url, params=params, headers=headers, data=audio_data)
+        with open(file_path, 'rb') as audio_file:
+            response = requests.post(api_url, params=params, headers=headers,
+                                     data=iter(lambda: audio_file.read(1 << 20), b''))
         
         # Check if the request was successful
         if response.status_code == 200:
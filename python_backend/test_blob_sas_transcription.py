@@ -7,7 +7,7 @@ It demonstrates the correct way to generate a Blob SAS URL for use with Deepgram
 import os
 import sys
 import logging
-import json
+import orjson
 from datetime import datetime, timedelta
 from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
 import requests
@@ -134,7 +134,7 @@ def transcribe_with_deepgram_api(blob_sas_url, model="nova-3", diarize=True):
         # Check if request was successful
         if response.status_code == 200:
             logger.info("Transcription successful")
-            return response.json()
+            return orjson.loads(response.content)
         else:
             logger.error(f"Transcription failed: {response.status_code} - {response.text}")
             return None
@@ -199,8 +199,8 @@ def main():
         
         # Save full result to file
         output_file = f"transcript_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         logger.info(f"Full transcription saved to {output_file}")
         
         return True
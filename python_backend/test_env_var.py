@@ -7,6 +7,7 @@ import asyncio
 import json
 import logging
 from deepgram_service import DeepgramService
+from http_session import aio_session_scope
 
 # Configure logging
 logging.basicConfig(
@@ -57,13 +58,15 @@ async def main():
     """Test both transcription methods on the same file"""
     audio_file = "test_speech_sdk.wav"
     
-    # First, test with SDK method
-    logger.info("TESTING WITH SDK METHOD")
-    await test_with_env_var(audio_file, "sdk")
-    
-    # Then, test with REST API method
-    logger.info("\n\nTESTING WITH REST API METHOD")
-    await test_with_env_var(audio_file, "rest_api")
+    # Both runs share the aiohttp session, which is closed before the loop ends
+    async with aio_session_scope():
+        # First, test with SDK method
+        logger.info("TESTING WITH SDK METHOD")
+        await test_with_env_var(audio_file, "sdk")
+        
+        # Then, test with REST API method
+        logger.info("\n\nTESTING WITH REST API METHOD")
+        await test_with_env_var(audio_file, "rest_api")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
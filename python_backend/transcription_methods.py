@@ -7,9 +7,11 @@ This module provides methods for transcribing audio using Deepgram:
 4. Using the modern Deepgram listen.rest API (recommended method)
 """
 import os
+import dataclasses
 import json
+import orjson
 import logging
-import requests
+from http_session import SESSION
 import asyncio
 import time
 from datetime import datetime
@@ -31,6 +33,30 @@ logger = logging.getLogger(__name__)
 # Get API key from environment or use a default for testing (replace in production)
 DEEPGRAM_API_KEY = os.environ.get("DEEPGRAM_API_KEY", "ba94baf7840441c378c58ccd1d5202c38ddc42d8")
 
+# listen.rest transcription options; identical for every call, so built once at import
+LISTEN_REST_OPTIONS = PrerecordedOptions(
+    model="nova-3",  # Using the latest model
+    smart_format=True,
+    diarize=True,
+    detect_language=True,
+    punctuate=True,
+    utterances=True,
+    summarize=True
+)
+
+# listen.rest client, created on first use and shared so its HTTP connection pool is reused
+_listen_client = None
+
+def _get_listen_client():
+    """Return the shared DeepgramClient; set DG_VERBOSE=1 for the SDK's debug logging"""
+    global _listen_client
+    if _listen_client is None:
+        client_options = DeepgramClientOptions(
+            verbose=logging.DEBUG if os.environ.get("DG_VERBOSE") == "1" else logging.WARNING
+        )
+        _listen_client = DeepgramClient(DEEPGRAM_API_KEY, options=client_options)
+    return _listen_client
+
 
 async def transcribe_with_sdk(audio_file_path):
     """
@@ -162,7 +188,7 @@ def transcribe_with_rest_api(audio_file_path):
         # Open and read audio file
         with open(audio_file_path, "rb") as audio:
             # Send POST request to Deepgram API
-            response = requests.post(
+            response = SESSION.post(
                 url, 
                 headers=headers,
                 params=params,
@@ -171,7 +197,7 @@ def transcribe_with_rest_api(audio_file_path):
             
             # Check if request was successful
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 
                 # Extract relevant information for debugging
                 try:
@@ -207,13 +233,14 @@ def transcribe_with_rest_api(audio_file_path):
         raise
 
 
-def transcribe_with_listen_rest(audio_url):
+def transcribe_with_listen_rest(audio_url, options=None):
     """
     Transcribe audio using Deepgram's listen.rest API with a Blob SAS URL.
     This is the modern, recommended approach for using Deepgram.
     
     Args:
         audio_url: The SAS URL to the audio file in Azure Blob Storage
+        options: Optional dict of option overrides applied to a copy of LISTEN_REST_OPTIONS
         
     Returns:
         dict: The complete Deepgram response
@@ -221,22 +248,11 @@ def transcribe_with_listen_rest(audio_url):
     try:
         logger.info(f"Transcribing using listen.rest API: {audio_url[:60]}...")
         
-        # Initialize the Deepgram client with our API key
-        client_options = DeepgramClientOptions(
-            verbose=True  # Enable verbose logging for debugging
-        )
-        deepgram = DeepgramClient(DEEPGRAM_API_KEY, options=client_options)
-        
-        # Set up transcription options
-        transcription_options = PrerecordedOptions(
-            model="nova-3",  # Using the latest model
-            smart_format=True,
-            diarize=True,
-            detect_language=True,
-            punctuate=True,
-            utterances=True,
-            summarize=True
-        )
+        # Shared Deepgram client with our API key
+        deepgram = _get_listen_client()
+        
+        # Reuse the shared options unless the caller overrides some of them
+        transcription_options = dataclasses.replace(LISTEN_REST_OPTIONS, **options) if options else LISTEN_REST_OPTIONS
         
         # Prepare the URL in the format expected by the API
         url_data = {
@@ -356,7 +372,7 @@ def transcribe_audio_directly(audio_file_path):
             start_time = time.time()
             
             # Send POST request to Deepgram API
-            response = requests.post(
+            response = SESSION.post(
                 url, 
                 headers=headers,
                 params=params,
@@ -369,7 +385,7 @@ def transcribe_audio_directly(audio_file_path):
             
             # Check if request was successful
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 
                 # Process result for easier transcript extraction
                 transcript_text = ""
@@ -460,7 +476,7 @@ def transcribe_audio_shortcut(audio_file_path):
                 len(result["results"]["channels"][0]["alternatives"]) > 0 and
                 "transcript" in result["results"]["channels"][0]["alternatives"][0]):
                 transcript_text = result["results"]["channels"][0]["alternatives"][0]["transcript"]
-                logger.info(f"Extracted transcript: {transcript_text[:50]}...")
+                logger.debug("Extracted transcript: %.50s...", transcript_text)
         
         # Format the result to match the extraction logic expectations
         # Add transcript at the root level to match Method 0 in the extraction logic
@@ -470,7 +486,7 @@ def transcribe_audio_shortcut(audio_file_path):
             "transcript": transcript_text  # This matches the first extraction path in the service
         }
         
-        logger.info(f"Returning response with keys: {response.keys()}")
+        logger.debug("Returning response with keys: %s", response.keys())
         return response
         
     except Exception as e:
@@ -0,0 +1,621 @@
+"""
+Storage of Deepgram transcriptions in Azure SQL Database
+
+Shared by the complete_integration_test script, which writes the results it
+waits for, and by app.py's /deepgram/callback route, which writes the ones
+Deepgram delivers to a callback URL. Importing this module has no side
+effects beyond reading its settings from the environment.
+"""
+
+import os
+import logging
+import queue
+import uuid
+import gzip
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import hashlib
+import hmac
+import re
+import orjson
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+import pymssql
+
+logger = logging.getLogger(__name__)
+
+# Azure SQL settings
+SQL_SERVER = os.environ.get("AZURE_SQL_SERVER", "callcenter1.database.windows.net")
+SQL_DATABASE = os.environ.get("AZURE_SQL_DATABASE", "call")
+SQL_USER = os.environ.get("AZURE_SQL_USER", "shahul")
+SQL_PASSWORD = os.environ.get("AZURE_SQL_PASSWORD", "apple123!@#")
+SQL_PORT = int(os.environ.get("AZURE_SQL_PORT", "1433"))
+
+# Container recorded as the source_path of stored assets
+SOURCE_CONTAINER = os.environ.get("AZURE_SOURCE_CONTAINER", "shahulin")
+
+# Set DEEPGRAM_DEBUG to write every Deepgram response to deepgram_response_<fileid>.json.gz
+DEEPGRAM_DEBUG = bool(os.environ.get("DEEPGRAM_DEBUG"))
+
+# Secret that signs Deepgram callback URLs; must be the same for the submitting
+# script and the app.py process receiving the callbacks
+DEEPGRAM_CALLBACK_SECRET = os.environ.get("DEEPGRAM_CALLBACK_SECRET")
+
+
+# ============================
+# DEEPGRAM RESPONSE PARSING
+# ============================
+
+class ParsedDG(NamedTuple):
+    """The fields of a Deepgram response that are stored, extracted once"""
+    transcript: str
+    language: Optional[str]
+    confidence: float
+    utterances: list
+    paragraphs: list
+
+
+def _parse_dg(resp):
+    """Walk a Deepgram response once and return the fields we read as a ParsedDG"""
+    results = resp.get('results') or {}
+    channel = (results.get('channels') or [{}])[0]
+    alternative = (channel.get('alternatives') or [{}])[0]
+    
+    return ParsedDG(
+        transcript=alternative.get('transcript', ''),
+        language=channel.get('detected_language'),
+        confidence=alternative.get('confidence', 0.0),
+        utterances=results.get('utterances', []),
+        paragraphs=(alternative.get('paragraphs') or results.get('paragraphs') or {}).get('paragraphs', [])
+    )
+
+
+_WORD_RE = re.compile(r'\S+')
+_SENTENCE_RE = re.compile(r'[^.!?]+[.!?]*')
+
+
+def _count_words(text):
+    """Count whitespace-separated words without building a list of them"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+
+def _drop_words(resp):
+    """
+    Remove the per-word arrays from a Deepgram response in place
+    
+    Word lists make up most of a diarized response but nothing downstream
+    stores them, so dropping them keeps queued results and cache rows small.
+    """
+    results = resp.get('results') or {}
+    for channel in results.get('channels', []):
+        for alternative in channel.get('alternatives', []):
+            alternative.pop('words', None)
+    for utterance in results.get('utterances', []):
+        utterance.pop('words', None)
+
+
+def build_transcription_result(result, diarize):
+    """Turn a decoded Deepgram response into the result dict used by store_in_sql_database"""
+    # Check if we have valid results
+    if 'results' not in result:
+        return {
+            'success': False,
+            'error': 'No results in Deepgram response',
+            'response_data': result
+        }
+    
+    # Keep the full response only when it is being dumped for debugging
+    if not DEEPGRAM_DEBUG:
+        _drop_words(result)
+    
+    # Extract the basic transcript
+    parsed = _parse_dg(result)
+    
+    # Extract speaker transcript if diarization is enabled
+    speaker_transcript = ""
+    if diarize and parsed.utterances:
+        speaker_transcript = "\n".join(
+            f"Speaker {utterance.get('speaker', 'unknown')}: {utterance.get('transcript', '')}"
+            for utterance in parsed.utterances
+        )
+    
+    return {
+        'success': True,
+        'basic_transcript': parsed.transcript,
+        'speaker_transcript': speaker_transcript,
+        'response_data': result,
+        'parsed': parsed
+    }
+
+
+# ============================
+# AZURE SQL DATABASE 
+# ============================
+
+# Connections kept open between calls, so each store does not pay for a new TLS + login handshake
+SQL_POOL_SIZE = int(os.environ.get("AZURE_SQL_POOL_SIZE", "4"))
+_sql_pool = queue.LifoQueue(maxsize=SQL_POOL_SIZE)
+
+
+def _connect_sql():
+    """Open a new connection to Azure SQL Database"""
+    try:
+        conn = pymssql.connect(
+            server=SQL_SERVER,
+            user=SQL_USER,
+            password=SQL_PASSWORD,
+            database=SQL_DATABASE,
+            port=SQL_PORT
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Error connecting to SQL database: {str(e)}")
+        raise
+
+
+def _is_alive(conn):
+    """Check that a pooled connection still answers a trivial query"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+@contextmanager
+def get_sql_connection():
+    """
+    Borrow a connection to Azure SQL Database from the pool
+    
+    Connections are returned to the pool when the block exits. Anything the
+    caller did not commit is rolled back first, and connections that fail are
+    closed instead of being returned.
+    
+    Yields:
+        pymssql.Connection: An open connection
+    """
+    conn = None
+    while conn is None:
+        try:
+            conn = _sql_pool.get_nowait()
+        except queue.Empty:
+            conn = _connect_sql()
+            break
+        if not _is_alive(conn):
+            logger.info("Discarding stale pooled SQL connection")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            conn = None
+    
+    try:
+        yield conn
+    except Exception:
+        conn.close()
+        raise
+    
+    try:
+        conn.rollback()
+        _sql_pool.put_nowait(conn)
+    except Exception:
+        conn.close()
+
+
+# Hot statements are sent through sp_executesql with their values as parameters.
+# pymssql inlines values into the SQL text, which makes every call a new ad-hoc
+# batch for the server to compile; with sp_executesql the statement text stays
+# the same, so SQL Server compiles it once and reuses the cached plan.
+CACHE_LOOKUP_SQL = (
+    "SELECT TOP 1 c.sha256, c.response_json FROM rdt_transcription_cache_blobs b "
+    "JOIN rdt_transcription_cache c ON c.sha256 = b.sha256 AND c.params_hash = @params_hash "
+    "WHERE b.blob_path = @blob_path AND b.blob_etag = @etag"
+)
+CACHE_LOOKUP_PARAMS = "@blob_path NVARCHAR(512), @etag NVARCHAR(255), @params_hash NVARCHAR(40)"
+
+INSERT_ASSET_SQL = (
+    "INSERT INTO rdt_assets (fileid, filename, source_path, destination_path, file_size, "
+    "upload_date, status, created_dt, transcription) "
+    "VALUES (@fileid, @filename, @source_path, @destination_path, @file_size, "
+    "@upload_date, @status, @created_dt, @transcription)"
+)
+INSERT_ASSET_PARAMS = (
+    "@fileid NVARCHAR(255), @filename NVARCHAR(255), @source_path NVARCHAR(255), "
+    "@destination_path NVARCHAR(255), @file_size INT, @upload_date DATETIME, "
+    "@status NVARCHAR(50), @created_dt DATETIME, @transcription NVARCHAR(MAX)"
+)
+
+
+# ============================
+# TRANSCRIPTION CACHE
+# ============================
+
+def hash_listen_params(params):
+    """Stable hash of the Deepgram query parameters, used as part of the cache key"""
+    return hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def blob_path_from_sas_url(blob_sas_url):
+    """Account, container and blob name of a SAS URL, without the SAS token"""
+    parts = urlsplit(blob_sas_url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def get_cached_transcription(blob_path, etag, params_hash):
+    """
+    Look up a cached Deepgram response for a blob version and parameter set
+    
+    ETags are only unique within one blob, so the blob's path is part of the
+    key; it maps to the SHA-256 of the content that version was found to have.
+    
+    Args:
+        blob_path: Blob path from blob_path_from_sas_url
+        etag: ETag of the blob, which changes whenever its content changes
+        params_hash: Hash of the Deepgram query parameters
+        
+    Returns:
+        dict: {'sha256', 'response_json'} for a cache hit, otherwise None
+    """
+    try:
+        with get_sql_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "EXEC sp_executesql %s, %s, @blob_path = %s, @etag = %s, @params_hash = %s",
+                (CACHE_LOOKUP_SQL, CACHE_LOOKUP_PARAMS, blob_path, etag, params_hash)
+            )
+            row = cursor.fetchone()
+            cursor.close()
+        return {'sha256': row[0], 'response_json': row[1]} if row else None
+    except Exception as e:
+        logger.warning(f"Transcription cache lookup failed: {str(e)}")
+        return None
+
+
+def merge_cache_row(cursor, sha256, params_hash, blob_path, etag, response_data):
+    """
+    Save a Deepgram response keyed by the audio's SHA-256 and the query parameters
+    
+    The blob version it was transcribed from is recorded separately, so blobs
+    that share the same content each keep their own entry for lookups. Rows
+    are written with the caller's cursor and committed with the rest of the
+    caller's transaction.
+    
+    Args:
+        cursor: Cursor on the connection the results are being stored with
+        sha256: SHA-256 of the blob content that was transcribed
+        params_hash: Hash of the Deepgram query parameters
+        blob_path: Blob path from blob_path_from_sas_url
+        etag: ETag of the blob, used for lookups before the blob is read
+        response_data: Decoded Deepgram response
+    """
+    response_json = orjson.dumps(response_data).decode()
+    cursor.execute("""
+        MERGE rdt_transcription_cache AS target
+        USING (SELECT %s AS sha256, %s AS params_hash) AS source
+        ON target.sha256 = source.sha256 AND target.params_hash = source.params_hash
+        WHEN MATCHED THEN
+            UPDATE SET response_json = %s, created_dt = GETDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (sha256, params_hash, response_json)
+            VALUES (source.sha256, source.params_hash, %s);
+    """, (sha256, params_hash, response_json, response_json))
+    if etag:
+        cursor.execute("""
+            MERGE rdt_transcription_cache_blobs AS target
+            USING (SELECT %s AS blob_path, %s AS blob_etag) AS source
+            ON target.blob_path = source.blob_path AND target.blob_etag = source.blob_etag
+            WHEN MATCHED THEN
+                UPDATE SET sha256 = %s
+            WHEN NOT MATCHED THEN
+                INSERT (blob_path, blob_etag, sha256)
+                VALUES (source.blob_path, source.blob_etag, %s);
+        """, (blob_path, etag, sha256, sha256))
+
+
+# ============================
+# DATABASE STORAGE FUNCTION
+# ============================
+
+# Sentence batches at least this large are bulk-copied instead of sent to RDS_InsertSentencesBatch
+BULK_COPY_MIN_ROWS = 500
+
+# rdt_sentences column ordinals: fileid, paragraph_id, sentence_idx, text, start_time, end_time, created_dt
+SENTENCE_BULK_COLUMNS = [2, 3, 4, 5, 6, 7, 8]
+
+
+def _bulk_copy_sentences(conn, fileid, sent_rows, created_dt):
+    """
+    Insert sentence rows with pymssql's bulk copy (BCP) instead of an INSERT
+    
+    The paragraphs these rows point at were just created, so there are no
+    existing sentences for RDS_InsertSentencesBatch's delete step to remove.
+    
+    Args:
+        conn: Open pymssql connection; the rows join its current transaction
+        fileid: Unique file ID for the asset
+        sent_rows: Sentence row dicts as built by store_in_sql_database
+        created_dt: Timestamp for the created_dt column
+    """
+    conn.bulk_copy(
+        "rdt_sentences",
+        [
+            (fileid, row['paragraph_id'], row['sentence_idx'], row['text'],
+             row['start_time'], row['end_time'], created_dt)
+            for row in sent_rows
+        ],
+        column_ids=SENTENCE_BULK_COLUMNS,
+        batch_size=1000
+    )
+
+
+def store_in_sql_database(fileid, blob_name, transcription_result, parsed=None, conn=None):
+    """
+    Store transcription results in Azure SQL database
+    
+    Args:
+        fileid: Unique file ID for the asset
+        blob_name: Name of the source blob
+        transcription_result: Result dict from the transcription step
+        parsed: ParsedDG for the response, if the caller already extracted it
+        conn: Open connection to write with; the caller then owns the commit
+            (used by SqlWriter to group several files). When omitted, a pooled
+            connection is borrowed and the file is committed on its own.
+    """
+    if conn is None:
+        try:
+            with get_sql_connection() as conn:
+                stored = store_in_sql_database(fileid, blob_name, transcription_result, parsed, conn=conn)
+                if stored[0]:
+                    conn.commit()
+                    logger.info("Final transaction commit successful")
+                return stored
+        except Exception as e:
+            logger.error(f"Error storing in SQL database: {str(e)}")
+            return False, {"error": str(e)}
+    
+    try:
+        if not transcription_result['success']:
+            logger.error(f"Cannot store unsuccessful transcription: {transcription_result['error']}")
+            return False, {"error": transcription_result['error']}
+        
+        # Extract data from transcription result
+        basic_transcript = transcription_result['basic_transcript']
+        speaker_transcript = transcription_result['speaker_transcript']
+        response_data = transcription_result['response_data']
+        if parsed is None:
+            parsed = _parse_dg(response_data)
+        
+        # Capture the timestamp and request ID once so every row for this file agrees
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # naive UTC for DATETIME columns
+        request_id = f"request_{uuid.uuid4().hex[:8]}"
+        
+        cursor = conn.cursor()
+        
+        # First, insert a record into rdt_assets including transcription
+        logger.info("Inserting asset record with transcription")
+        
+        # Log the transcription content we're about to store
+        transcript_preview = parsed.transcript
+        logger.info(f"TRANSCRIPTION: {transcript_preview[:100]}..." if len(transcript_preview) > 100 else f"TRANSCRIPTION: {transcript_preview}")
+        
+        # Insert the asset record and its audio metadata in one batch (one round trip);
+        # both are committed together with everything else below, and
+        # paragraph/sentence errors are caught so they can't roll them back
+        cursor.execute("""
+            EXEC sp_executesql %s, %s,
+            @fileid = %s,
+            @filename = %s,
+            @source_path = %s,
+            @destination_path = %s,
+            @file_size = %s,
+            @upload_date = %s,
+            @status = %s,
+            @created_dt = %s,
+            @transcription = %s;
+            
+            EXEC RDS_InsertAudioMetadata
+            @fileid = %s,
+            @request_id = %s,
+            @sha256 = %s,
+            @created_timestamp = %s,
+            @audio_duration = %s,
+            @confidence = %s,
+            @status = %s
+        """, (
+            INSERT_ASSET_SQL,
+            INSERT_ASSET_PARAMS,
+            fileid,
+            blob_name,
+            SOURCE_CONTAINER,  # Source container - use global variable
+            None,              # Destination path
+            0,                 # File size (not available)
+            now,               # Upload date
+            "completed",       # Status
+            now,               # Created date
+            basic_transcript,  # Transcription text
+            fileid,
+            request_id,
+            transcription_result.get('sha256', ''),  # SHA-256 of the audio blob
+            now.isoformat(),
+            0.0,  # Audio duration (not available)
+            0.9,  # Default confidence
+            "completed"
+        ))
+        logger.info("Asset record and audio metadata inserted")
+        
+        # Extract and insert paragraphs/utterances
+        para_count = 0
+        sent_count = 0
+        
+        try:
+            # Process paragraphs - adding more detailed debugging
+            logger.info(f"Checking paragraphs structure: 'results' in response_data: {'results' in response_data}")
+            logger.info(f"Available keys in results: {list(response_data['results'].keys()) if 'results' in response_data else []}")
+            
+            # Write the entire response to a file for inspection
+            if DEEPGRAM_DEBUG:
+                # gzip level 1 is cheap to compress and shrinks the JSON several times; read with gunzip -c
+                with gzip.open(f"deepgram_response_{fileid}.json.gz", "wb", compresslevel=1) as f:
+                    f.write(orjson.dumps(response_data))
+                logger.info(f"Wrote complete response to deepgram_response_{fileid}.json.gz")
+            
+            if parsed.utterances:
+                logger.debug("First utterance sample: %s", parsed.utterances[0])
+            
+            # Prefer Deepgram's paragraphs, which come with sentence boundaries and timings
+            paragraphs = []
+            if parsed.paragraphs:
+                logger.info(f"Using {len(parsed.paragraphs)} Deepgram paragraphs")
+                for paragraph in parsed.paragraphs:
+                    sentences = paragraph.get('sentences') or []
+                    paragraphs.append({
+                        'text': ' '.join(sentence.get('text', '') for sentence in sentences),
+                        'start': paragraph.get('start', 0.0),
+                        'end': paragraph.get('end', 0.0),
+                        'speaker': paragraph.get('speaker', 0),
+                        'num_words': paragraph.get('num_words'),
+                        'sentences': sentences
+                    })
+            else:
+                # Fall back to utterances as paragraphs; their sentences are split out below
+                logger.info(f"Using {len(parsed.utterances)} utterances as paragraphs")
+                for utterance in parsed.utterances:
+                    paragraphs.append({
+                        'text': utterance.get('transcript', ''),
+                        'start': utterance.get('start', 0.0),
+                        'end': utterance.get('end', 0.0),
+                        'speaker': utterance.get('speaker', 0),
+                        'num_words': None,
+                        'sentences': None
+                    })
+            
+            # Build one row per paragraph and insert them all in a single call
+            para_rows = []
+            for idx, paragraph in enumerate(paragraphs):
+                para_text = paragraph.get('text', '')
+                para_speaker = paragraph.get('speaker', 0)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Processing paragraph %s: speaker=%s, length=%s, start=%s, end=%s",
+                                 idx, para_speaker, len(para_text),
+                                 paragraph.get('start', 0.0), paragraph.get('end', 0.0))
+                para_rows.append({
+                    'paragraph_idx': idx,
+                    'text': para_text,
+                    'start_time': paragraph.get('start', 0.0),
+                    'end_time': paragraph.get('end', 0.0),
+                    'speaker': str(para_speaker),
+                    'num_words': paragraph['num_words'] if paragraph['num_words'] is not None else _count_words(para_text)
+                })
+            
+            if para_rows:
+                cursor.execute("""
+                    EXEC RDS_InsertParagraphsBatch
+                    @fileid = %s,
+                    @rows = %s
+                    """, (fileid, orjson.dumps(para_rows).decode()))
+                
+                # Map paragraph_idx -> paragraph_id from the procedure's result set
+                paragraph_ids = dict(cursor.fetchall())
+                para_count = len(paragraph_ids)
+                
+                # Use Deepgram's sentences where it returned them, otherwise split the text on . ! ?
+                sent_rows = []
+                for row, paragraph in zip(para_rows, paragraphs):
+                    if paragraph['sentences']:
+                        paragraph_id = paragraph_ids[row['paragraph_idx']]
+                        sent_rows.extend(
+                            {
+                                'paragraph_id': paragraph_id,
+                                'sentence_idx': str(sent_idx),
+                                'text': sentence.get('text', ''),
+                                'start_time': sentence.get('start', 0.0),
+                                'end_time': sentence.get('end', 0.0)
+                            }
+                            for sent_idx, sentence in enumerate(paragraph['sentences'])
+                        )
+                        continue
+                    
+                    sentences = [match for match in _SENTENCE_RE.finditer(row['text']) if match.group().strip()]
+                    if not sentences:
+                        continue
+                    # Spread the paragraph's time over its sentences in proportion to their length
+                    para_start = row['start_time']
+                    time_per_char = (row['end_time'] - para_start) / sentences[-1].end()
+                    paragraph_id = paragraph_ids[row['paragraph_idx']]
+                    sent_rows.extend(
+                        {
+                            'paragraph_id': paragraph_id,
+                            'sentence_idx': str(sent_idx),
+                            'text': match.group().strip(),
+                            'start_time': para_start + match.start() * time_per_char,
+                            'end_time': para_start + match.end() * time_per_char
+                        }
+                        for sent_idx, match in enumerate(sentences)
+                    )
+                
+                if len(sent_rows) >= BULK_COPY_MIN_ROWS:
+                    # Large transcripts: load sentences with the TDS bulk-copy protocol
+                    _bulk_copy_sentences(conn, fileid, sent_rows, now)
+                    sent_count = len(sent_rows)
+                elif sent_rows:
+                    cursor.execute("""
+                    EXEC RDS_InsertSentencesBatch
+                    @fileid = %s,
+                    @rows = %s
+                    """, (fileid, orjson.dumps(sent_rows).decode()))
+                    sent_count = len(sent_rows)
+        except Exception as e:
+            logger.error(f"Error processing paragraphs/sentences: {str(e)}")
+            # Continue with the rest of the function, don't throw exception
+        
+        cursor.close()
+        
+        logger.info(f"Successfully stored transcription results in SQL database. Paragraphs: {para_count}, Sentences: {sent_count}")
+        return True, {"paragraphs": para_count, "sentences": sent_count}
+    
+    except Exception as e:
+        logger.error(f"Error storing in SQL database: {str(e)}")
+        return False, {"error": str(e)}
+
+
+def callback_token(fileid, blob_name):
+    """
+    Token that authorizes Deepgram's callback for one submitted file
+    
+    The token is an HMAC of the file ID and blob name, so a callback is only
+    accepted for a fileid/blob_name pair that was actually submitted.
+    
+    Returns:
+        str: Hex token, or None when DEEPGRAM_CALLBACK_SECRET is not set
+    """
+    if not DEEPGRAM_CALLBACK_SECRET:
+        return None
+    message = f"{fileid}\n{blob_name}".encode()
+    return hmac.new(DEEPGRAM_CALLBACK_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_callback_token(fileid, blob_name, token):
+    """Check a callback's token against the one issued for fileid and blob_name"""
+    expected = callback_token(fileid, blob_name)
+    return bool(expected and token) and hmac.compare_digest(expected, token)
+
+
+def store_callback_result(fileid, blob_name, response_data):
+    """
+    Store a transcription that Deepgram delivered to the callback URL
+    
+    Args:
+        fileid: File ID the callback URL was created for
+        blob_name: Name of the source blob
+        response_data: Decoded Deepgram response from the callback body
+        
+    Returns:
+        tuple: (success, result_info) from store_in_sql_database
+    """
+    transcription_result = build_transcription_result(response_data, diarize=True)
+    transcription_result['sha256'] = (response_data.get('metadata') or {}).get('sha256', '')
+    return store_in_sql_database(fileid, blob_name, transcription_result,
+                                 parsed=transcription_result.get('parsed'))
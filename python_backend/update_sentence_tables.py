@@ -3,6 +3,7 @@
 Create new SQL tables for storing paragraph and sentence-level data from Deepgram transcriptions
 """
 import os
+import json
 import logging
 import pymssql
 from azure_sql_service import AzureSQLService
@@ -71,43 +72,50 @@ def store_transcription_details(fileid, transcription_response):
             (fileid, request_id, sha256, created, duration, confidence)
         )
         
-        # 2. Store paragraphs and sentences
-        if 'paragraphs' in transcription_response and transcription_response['paragraphs']:
-            for para_idx, paragraph in enumerate(transcription_response['paragraphs']):
-                # Insert paragraph
-                para_text = paragraph.get('text', '')
-                para_start = paragraph.get('start', 0)
-                para_end = paragraph.get('end', 0)
-                para_speaker = paragraph.get('speaker', 'unknown')
-                para_num_words = paragraph.get('num_words', 0)
-                
-                # Execute the stored procedure and get the new paragraph ID
-                cursor.execute(
-                    "DECLARE @new_para_id INT; EXEC RDS_InsertParagraph @fileid=%s, @paragraph_idx=%s, @text=%s, @start_time=%s, @end_time=%s, @speaker=%s, @num_words=%s, @paragraph_id=@new_para_id OUTPUT; SELECT @new_para_id;",
-                    (fileid, para_idx, para_text, para_start, para_end, para_speaker, para_num_words)
-                )
-                
-                # Get the paragraph ID
-                result = cursor.fetchone()
-                paragraph_id = result[0] if result else None
-                
+        # 2. Store all paragraphs in one call; their IDs come back in a single result set
+        paragraphs = transcription_response.get('paragraphs') or []
+        if paragraphs:
+            para_rows = [
+                {
+                    'paragraph_idx': para_idx,
+                    'text': paragraph.get('text', ''),
+                    'start_time': paragraph.get('start', 0),
+                    'end_time': paragraph.get('end', 0),
+                    'speaker': str(paragraph.get('speaker', 'unknown')),
+                    'num_words': paragraph.get('num_words', 0)
+                }
+                for para_idx, paragraph in enumerate(paragraphs)
+            ]
+            cursor.execute(
+                "EXEC RDS_InsertParagraphsBatch @fileid=%s, @rows=%s",
+                (fileid, json.dumps(para_rows))
+            )
+            
+            # Map paragraph_idx -> new paragraph ID (rows are dicts with this connection)
+            paragraph_ids = {row['paragraph_idx']: row['id'] for row in cursor.fetchall()}
+            
+            # 3. Store the sentences of every paragraph in one call
+            sent_rows = []
+            for para_idx, paragraph in enumerate(paragraphs):
+                paragraph_id = paragraph_ids.get(para_idx)
                 if not paragraph_id:
                     logger.warning(f"Failed to get paragraph ID for paragraph {para_idx} in file {fileid}")
                     continue
                 
-                # Insert sentences for this paragraph
-                if 'sentences' in paragraph and paragraph['sentences']:
-                    for sent in paragraph['sentences']:
-                        sent_idx = sent.get('id', f"{para_idx}_0")
-                        sent_text = sent.get('text', '')
-                        sent_start = sent.get('start', 0)
-                        sent_end = sent.get('end', 0)
-                        
-                        # Execute the stored procedure
-                        cursor.execute(
-                            "EXEC RDS_InsertSentence @fileid=%s, @paragraph_id=%s, @sentence_idx=%s, @text=%s, @start_time=%s, @end_time=%s",
-                            (fileid, paragraph_id, sent_idx, sent_text, sent_start, sent_end)
-                        )
+                for sent in paragraph.get('sentences') or []:
+                    sent_rows.append({
+                        'paragraph_id': paragraph_id,
+                        'sentence_idx': sent.get('id', f"{para_idx}_0"),
+                        'text': sent.get('text', ''),
+                        'start_time': sent.get('start', 0),
+                        'end_time': sent.get('end', 0)
+                    })
+            
+            if sent_rows:
+                cursor.execute(
+                    "EXEC RDS_InsertSentencesBatch @fileid=%s, @rows=%s",
+                    (fileid, json.dumps(sent_rows))
+                )
         
         # Commit the changes
         conn.commit()
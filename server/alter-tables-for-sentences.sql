@@ -136,59 +136,57 @@ END
 ELSE
     PRINT 'Stored procedure RDS_InsertAudioMetadata already exists';
 
--- Create stored procedure for inserting paragraphs
-IF NOT EXISTS (SELECT * FROM sys.procedures WHERE name = 'RDS_InsertParagraph')
+-- Create (or update) stored procedure for inserting paragraphs
+-- The new paragraph id is returned as a result set; @paragraph_id OUTPUT is kept for older callers
+EXEC('
+CREATE OR ALTER PROCEDURE RDS_InsertParagraph
+    @fileid NVARCHAR(255),
+    @paragraph_idx INT,
+    @text NVARCHAR(MAX),
+    @start_time FLOAT,
+    @end_time FLOAT,
+    @speaker NVARCHAR(50),
+    @num_words INT,
+    @paragraph_id INT = NULL OUTPUT
+AS
 BEGIN
-    EXEC('
-    CREATE PROCEDURE RDS_InsertParagraph
-        @fileid NVARCHAR(255),
-        @paragraph_idx INT,
-        @text NVARCHAR(MAX),
-        @start_time FLOAT,
-        @end_time FLOAT,
-        @speaker NVARCHAR(50),
-        @num_words INT,
-        @paragraph_id INT OUTPUT
-    AS
-    BEGIN
-        -- Delete existing paragraphs for this fileid and paragraph_idx
-        DELETE FROM rdt_sentences 
-        WHERE paragraph_id IN (
-            SELECT id FROM rdt_paragraphs 
-            WHERE fileid = @fileid AND paragraph_idx = @paragraph_idx
-        );
-        
-        DELETE FROM rdt_paragraphs 
-        WHERE fileid = @fileid AND paragraph_idx = @paragraph_idx;
-        
-        -- Insert new paragraph
-        INSERT INTO rdt_paragraphs (
-            fileid,
-            paragraph_idx,
-            text,
-            start_time,
-            end_time,
-            speaker,
-            num_words
-        )
-        VALUES (
-            @fileid,
-            @paragraph_idx,
-            @text,
-            @start_time,
-            @end_time,
-            @speaker,
-            @num_words
-        );
-        
-        -- Return the new paragraph ID
-        SET @paragraph_id = SCOPE_IDENTITY();
-    END
-    ');
-    PRINT 'Created stored procedure: RDS_InsertParagraph';
+    SET NOCOUNT ON;
+
+    -- Delete existing paragraphs for this fileid and paragraph_idx
+    DELETE FROM rdt_sentences 
+    WHERE paragraph_id IN (
+        SELECT id FROM rdt_paragraphs 
+        WHERE fileid = @fileid AND paragraph_idx = @paragraph_idx
+    );
+    
+    DELETE FROM rdt_paragraphs 
+    WHERE fileid = @fileid AND paragraph_idx = @paragraph_idx;
+    
+    -- Insert new paragraph and return its ID
+    INSERT INTO rdt_paragraphs (
+        fileid,
+        paragraph_idx,
+        text,
+        start_time,
+        end_time,
+        speaker,
+        num_words
+    )
+    OUTPUT INSERTED.id
+    VALUES (
+        @fileid,
+        @paragraph_idx,
+        @text,
+        @start_time,
+        @end_time,
+        @speaker,
+        @num_words
+    );
+    
+    SET @paragraph_id = SCOPE_IDENTITY();
 END
-ELSE
-    PRINT 'Stored procedure RDS_InsertParagraph already exists';
+');
+PRINT 'Created or updated stored procedure: RDS_InsertParagraph';
 
 -- Create stored procedure for inserting sentences
 IF NOT EXISTS (SELECT * FROM sys.procedures WHERE name = 'RDS_InsertSentence')
@@ -229,4 +227,114 @@ BEGIN
     PRINT 'Created stored procedure: RDS_InsertSentence';
 END
 ELSE
-    PRINT 'Stored procedure RDS_InsertSentence already exists';
\ No newline at end of file
+    PRINT 'Stored procedure RDS_InsertSentence already exists';
+
+-- Create (or update) stored procedure for inserting all paragraphs of a file in one call
+-- @rows is a JSON array of {paragraph_idx, text, start_time, end_time, speaker, num_words}
+EXEC('
+CREATE OR ALTER PROCEDURE RDS_InsertParagraphsBatch
+    @fileid NVARCHAR(255),
+    @rows NVARCHAR(MAX)
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @paragraphs TABLE (
+        paragraph_idx INT,
+        text NVARCHAR(MAX),
+        start_time FLOAT,
+        end_time FLOAT,
+        speaker NVARCHAR(50),
+        num_words INT
+    );
+
+    INSERT INTO @paragraphs
+    SELECT paragraph_idx, text, start_time, end_time, speaker, num_words
+    FROM OPENJSON(@rows)
+    WITH (
+        paragraph_idx INT ''$.paragraph_idx'',
+        text NVARCHAR(MAX) ''$.text'',
+        start_time FLOAT ''$.start_time'',
+        end_time FLOAT ''$.end_time'',
+        speaker NVARCHAR(50) ''$.speaker'',
+        num_words INT ''$.num_words''
+    );
+
+    -- Delete existing paragraphs (and their sentences) for these paragraph indexes
+    DELETE FROM rdt_sentences
+    WHERE paragraph_id IN (
+        SELECT id FROM rdt_paragraphs
+        WHERE fileid = @fileid
+          AND paragraph_idx IN (SELECT paragraph_idx FROM @paragraphs)
+    );
+
+    DELETE FROM rdt_paragraphs
+    WHERE fileid = @fileid
+      AND paragraph_idx IN (SELECT paragraph_idx FROM @paragraphs);
+
+    -- Insert new paragraphs and return (paragraph_idx, paragraph_id) pairs
+    INSERT INTO rdt_paragraphs (
+        fileid,
+        paragraph_idx,
+        text,
+        start_time,
+        end_time,
+        speaker,
+        num_words
+    )
+    OUTPUT INSERTED.paragraph_idx, INSERTED.id
+    SELECT @fileid, paragraph_idx, text, start_time, end_time, speaker, num_words
+    FROM @paragraphs;
+END
+');
+PRINT 'Created or updated stored procedure: RDS_InsertParagraphsBatch';
+
+-- Create (or update) stored procedure for inserting all sentences of a file in one call
+-- @rows is a JSON array of {paragraph_id, sentence_idx, text, start_time, end_time}
+EXEC('
+CREATE OR ALTER PROCEDURE RDS_InsertSentencesBatch
+    @fileid NVARCHAR(255),
+    @rows NVARCHAR(MAX)
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @sentences TABLE (
+        paragraph_id INT,
+        sentence_idx NVARCHAR(50),
+        text NVARCHAR(MAX),
+        start_time FLOAT,
+        end_time FLOAT
+    );
+
+    INSERT INTO @sentences
+    SELECT paragraph_id, sentence_idx, text, start_time, end_time
+    FROM OPENJSON(@rows)
+    WITH (
+        paragraph_id INT ''$.paragraph_id'',
+        sentence_idx NVARCHAR(50) ''$.sentence_idx'',
+        text NVARCHAR(MAX) ''$.text'',
+        start_time FLOAT ''$.start_time'',
+        end_time FLOAT ''$.end_time''
+    );
+
+    -- Delete existing sentences for these paragraph_id/sentence_idx pairs (if any)
+    DELETE s
+    FROM rdt_sentences s
+    INNER JOIN @sentences n
+        ON s.paragraph_id = n.paragraph_id AND s.sentence_idx = n.sentence_idx;
+
+    -- Insert new sentences
+    INSERT INTO rdt_sentences (
+        fileid,
+        paragraph_id,
+        sentence_idx,
+        text,
+        start_time,
+        end_time
+    )
+    SELECT @fileid, paragraph_id, sentence_idx, text, start_time, end_time
+    FROM @sentences;
+END
+');
+PRINT 'Created or updated stored procedure: RDS_InsertSentencesBatch';
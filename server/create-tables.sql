@@ -184,4 +184,36 @@ BEGIN
         FOREIGN KEY (diarization_id) REFERENCES rdt_speaker_diarization(id);
         PRINT 'Added foreign key: FK_speaker_segments_speaker_diarization';
     END
-END
\ No newline at end of file
+END
+-- Cache of Deepgram responses keyed by audio content and request parameters
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'rdt_transcription_cache')
+BEGIN
+    CREATE TABLE rdt_transcription_cache (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        sha256 NVARCHAR(64) NOT NULL,
+        params_hash NVARCHAR(40) NOT NULL,
+        response_json NVARCHAR(MAX) NOT NULL,
+        created_dt DATETIME DEFAULT GETDATE() NOT NULL,
+        CONSTRAINT UQ_transcription_cache_sha256_params UNIQUE (sha256, params_hash)
+    );
+    PRINT 'Created table: rdt_transcription_cache';
+END
+ELSE
+    PRINT 'Table rdt_transcription_cache already exists';
+
+-- Audio SHA-256 of each blob version, so a blob can be looked up in the cache
+-- by its path and ETag before it is read
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'rdt_transcription_cache_blobs')
+BEGIN
+    CREATE TABLE rdt_transcription_cache_blobs (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        blob_path NVARCHAR(512) NOT NULL,
+        blob_etag NVARCHAR(255) NOT NULL,
+        sha256 NVARCHAR(64) NOT NULL,
+        created_dt DATETIME DEFAULT GETDATE() NOT NULL,
+        CONSTRAINT UQ_transcription_cache_blobs_path_etag UNIQUE (blob_path, blob_etag)
+    );
+    PRINT 'Created table: rdt_transcription_cache_blobs';
+END
+ELSE
+    PRINT 'Table rdt_transcription_cache_blobs already exists';